@@ -0,0 +1,196 @@
+from typing import Iterator, Union
+
+import json
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+
+# msgpack is smaller and faster to decode, json is used when it is not installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MatchArchive:
+    """
+    Append only archive of the match dictionaries returned by request_match_info. Each match is stored as a length
+    prefixed, zlib compressed msgpack (or json) record in the data file, and a fixed size index file maps every match
+    id to the offset of its record. The index is memory mapped so random access by match id doesn't need to load the
+    archive, and iterating streams records from disk in batches for match_dataframe, maps_dataframe,
+    normalize_matches or the process_* methods.
+    If a match is appended again (for example after it was updated), the latest record is the one returned.
+
+        with MatchArchive("matches.hltv") as archive:
+            archive.extend(raw_data)
+            for batch in archive.iter_batches(1000):
+                frames = bot.normalize_matches(batch)
+    """
+
+    magic = b"HLTVARC1"
+    # Record prefix: compressed payload length
+    record_header = struct.Struct("<I")
+    # Index entries: match id, record offset, record length
+    index_dtype = np.dtype([("match_id", "<i8"), ("offset", "<u8"), ("length", "<u4")])
+
+    def __init__(self, path: str, codec: str = None):
+        """
+        :param path: data file path, the index is stored next to it with an .idx suffix
+        :type path: str
+        :param codec: "msgpack" or "json" for new archives, defaults to msgpack if it is installed. Existing archives
+                      keep the codec they were created with
+        :type codec: str
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                header = file.read(len(self.magic) + 1)
+            if header[:len(self.magic)] != self.magic:
+                raise ValueError("{} is not a match archive".format(path))
+            self.codec = ("msgpack" if header[-1:] == b"m" else "json")
+        else:
+            self.codec = codec or ("msgpack" if msgpack is not None else "json")
+            with open(path, "wb") as file:
+                file.write(self.magic + (b"m" if self.codec == "msgpack" else b"j"))
+            open(self.index_path, "wb").close()
+
+        if self.codec == "msgpack" and msgpack is None:
+            raise ImportError("This archive uses msgpack, install it with 'pip install msgpack'")
+
+        self.data = open(path, "r+b")
+        self.index_file = open(self.index_path, "r+b")
+        self._mmap = None
+        self._index = np.empty(0, dtype=self.index_dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._index = np.empty(0, dtype=self.index_dtype)
+            self._mmap.close()
+            self._mmap = None
+        self.data.close()
+        self.index_file.close()
+
+    def _encode(self, match: dict) -> bytes:
+        if self.codec == "msgpack":
+            return msgpack.packb(match)
+        return json.dumps(match, separators=(",", ":")).encode()
+
+    def _decode(self, payload: bytes) -> dict:
+        if self.codec == "msgpack":
+            return msgpack.unpackb(payload, strict_map_key=False)
+        return json.loads(payload)
+
+    @property
+    def index(self) -> np.ndarray:
+        """
+        Structured array view of the memory mapped index, remapped only when entries were appended since last access
+        """
+        size = os.fstat(self.index_file.fileno()).st_size
+        if size != self._index.nbytes:
+            if self._mmap is not None:
+                self._index = np.empty(0, dtype=self.index_dtype)
+                self._mmap.close()
+            self._mmap = (mmap.mmap(self.index_file.fileno(), size, access=mmap.ACCESS_READ) if size else None)
+            self._index = (np.frombuffer(self._mmap, dtype=self.index_dtype) if size
+                           else np.empty(0, dtype=self.index_dtype))
+        return self._index
+
+    def append(self, match: dict) -> None:
+        """
+        Appends a match dictionary returned by request_match_info to the archive
+        :param match: match dictionary
+        :type match: dict
+        """
+        self.extend([match])
+
+    def extend(self, matches: list[dict]) -> None:
+        """
+        Appends many match dictionaries, data and index are flushed once for the whole list
+        :param matches: match dictionaries returned by request_match_info
+        :type matches: list[dict]
+        """
+        self.data.seek(0, os.SEEK_END)
+        offset = self.data.tell()
+        entries = np.empty(len(matches), dtype=self.index_dtype)
+        for i, match in enumerate(matches):
+            payload = zlib.compress(self._encode(match))
+            self.data.write(self.record_header.pack(len(payload)) + payload)
+            entries[i] = (match["match_info"]["match_id"], offset, len(payload))
+            offset += self.record_header.size + len(payload)
+        self.data.flush()
+
+        # Index is written after the data so an interrupted append never points to a missing record
+        self.index_file.seek(0, os.SEEK_END)
+        self.index_file.write(entries.tobytes())
+        self.index_file.flush()
+
+    def _read(self, offset: int, length: int) -> dict:
+        self.data.seek(offset + self.record_header.size)
+        return self._decode(zlib.decompress(self.data.read(length)))
+
+    def _latest(self) -> np.ndarray:
+        """
+        Returns the index entries of the latest record of every match, sorted by offset for sequential reads
+        """
+        index = self.index
+        # np.unique returns the first occurrence, so it is applied over the reversed index to keep the latest one
+        _, positions = np.unique(index["match_id"][::-1], return_index=True)
+        latest = index[len(index) - 1 - positions]
+        return latest[np.argsort(latest["offset"])]
+
+    def get(self, match_id: int) -> Union[dict, None]:
+        """
+        Returns the latest stored dictionary of a match
+        :param match_id: match id number
+        :type match_id: int
+        :return: match dictionary or None if the match is not archived
+        :rtype: dict, None
+        """
+        positions = np.flatnonzero(self.index["match_id"] == int(match_id))
+        if len(positions) == 0:
+            return None
+        entry = self.index[positions[-1]]
+        return self._read(int(entry["offset"]), int(entry["length"]))
+
+    def __contains__(self, match_id: int) -> bool:
+        return bool((self.index["match_id"] == int(match_id)).any())
+
+    def __len__(self) -> int:
+        return len(np.unique(self.index["match_id"]))
+
+    def ids(self) -> list[int]:
+        """
+        Returns the archived match ids
+        """
+        return np.unique(self.index["match_id"]).tolist()
+
+    def __iter__(self) -> Iterator[dict]:
+        for entry in self._latest():
+            yield self._read(int(entry["offset"]), int(entry["length"]))
+
+    def iter_batches(self, size: int = 1000) -> Iterator[list[dict]]:
+        """
+        Streams the archived matches in lists of at most size dictionaries, only one batch is held in memory
+        :param size: number of matches per batch
+        :type size: int
+        :return: iterator of lists of match dictionaries
+        :rtype: Iterator[list[dict]]
+        """
+        batch = []
+        for match in self:
+            batch.append(match)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
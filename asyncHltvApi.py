@@ -0,0 +1,147 @@
+from collections import deque
+from typing import Union
+from hltvApi import HltvApi, MapStatsRows, MatchRows
+from scheduler import MatchScheduler
+from scraper.async_scraper import AsyncScraper
+from scraper.cache import EntityCache
+from scraper.scraper import Scraper
+from sinks import Sink
+
+import asyncio
+import pandas as pd
+
+
+class AsyncHltvApi(AsyncScraper, HltvApi):
+    """
+    Asyncio version of HltvApi. Request methods are the awaitable ones from AsyncScraper while DataFrame and process
+    methods are inherited from HltvApi, so both interfaces return the same data
+    """
+
+    async def enrich_dataframe(self, kind: str, ids: list, cache: EntityCache = None) -> pd.DataFrame:
+        """
+        Obtains the details of the events, teams or players referenced by a dimension DataFrame, same as
+        HltvApi.enrich_dataframe
+        :param kind: "event", "team" or "player"
+        :type kind: str
+        :param ids: entity ids
+        :type ids: list
+        :param cache: persistent cache shared between runs
+        :type cache: EntityCache
+        :return: DataFrame indexed by entity id with self.df_entity_cols[kind] columns
+        :rtype: pd.DataFrame
+        """
+        entities = await self.get_entities(kind, ids, cache)
+
+        return pd.DataFrame.from_dict(entities, orient="index", columns=self.df_entity_cols[kind])
+
+    async def start_mapstats_queue(self, map_ids: Union[list, pd.DataFrame], sink: Sink = None, chunk_size: int = 500,
+                                   cache: EntityCache = None, exclude: Union[list, set] = None) -> list[pd.DataFrame]:
+        """
+        Requests the mapstatsid pages of already processed maps concurrently and returns the same DataFrames as
+        HltvApi.start_mapstats_queue, skipping the same maps. Maps that could not be extracted or written are kept in
+        self.failed_maps
+        :param map_ids: map ids, or the MapsFact DataFrame returned by start_matches_queue (its mapid column is used)
+        :type map_ids: list, pd.DataFrame
+        :param sink: destination for the flushed chunks (CsvSink, SqliteSink, ParquetSink)
+        :type sink: Sink
+        :param chunk_size: number of maps requested and flushed together
+        :type chunk_size: int
+        :param cache: persistent cache shared between runs
+        :type cache: EntityCache
+        :param exclude: map ids that are already stored and must not be processed
+        :type exclude: list, set
+        :return: list of DataFrames ordered as sinks.MAP_TABLE_NAMES, when a sink is used only the last chunk is
+                 returned (it is also written to the sink)
+        :rtype: list of DataFrames
+        """
+        map_ids = self._pending_maps(map_ids, sink, exclude)
+        self.failed_maps = []
+
+        rows = MapStatsRows(self)
+        frames = rows.frames()
+        for i in range(0, len(map_ids), chunk_size):
+            chunk = map_ids[i:i + chunk_size]
+            self._add_map_stats(rows, chunk, await self.get_entities("mapstats", chunk, cache))
+
+            print("PROCESSED MAPS: ", min(i + chunk_size, len(map_ids)), "/", len(map_ids))
+            if sink is not None:
+                frames = self._flush_map_chunk(rows, sink)
+
+        if sink is not None:
+            sink.close()
+            return frames
+
+        return rows.frames()
+
+    async def start_matches_queue(self, matches: Union[list[tuple], deque, MatchScheduler], sink: Sink = None,
+                                  chunk_size: int = 500, max_memory_mb: float = None,
+                                  dead_letters=None, validator=None) -> list[pd.DataFrame]:
+        """
+        Requests every match in the container concurrently and returns the same normalized DataFrames as
+        HltvApi.start_matches_queue. Failed matches are stored in self.failed_extractions
+        :param matches: matches container with tuples in format (teamid, matchlink), popped in the same order as
+                        HltvApi.start_matches_queue whenever a worker is free
+        :type matches: list, deque, MatchScheduler
+        :param sink: destination for the flushed chunks (CsvSink, SqliteSink, ParquetSink)
+        :type sink: Sink
+        :param chunk_size: number of processed matches that triggers a flush to the sink
+        :type chunk_size: int
+        :param max_memory_mb: approximate size in megabytes of the stored rows that triggers a flush to the sink
+        :type max_memory_mb: float
+        :param dead_letters: if provided, failed matches are recorded in it as network or parse failures, parse
+                             failures keep the response bytes so they can be retried with DeadLetterQueue.retry_parse
+        :type dead_letters: DeadLetterQueue
+        :param validator: if provided, every chunk is checked against the database schema before it is written and
+                          the offending rows are quarantined
+        :type validator: FrameValidator
+        :return: list of DataFrames with match, map, player, team and event information, when a sink is used only the
+                 last chunk is returned (it is also written to the sink)
+        :rtype: list of DataFrames
+        """
+        # Create matches container
+        if isinstance(matches, list):
+            match_container = deque(matches)
+        elif isinstance(matches, (deque, MatchScheduler)):
+            match_container = matches
+        else:
+            raise TypeError("Please provide a valid match list to iterate over")
+
+        self.failed_extractions = deque()
+        rows = MatchRows(self, validator)
+
+        async def worker() -> None:
+            # Each worker takes the next match once it is free, so the container order is kept and matches added to
+            # it while the queue runs are processed too
+            while len(match_container) > 0:
+                current = match_container.pop()
+                content = None
+                try:
+                    content = await self.request_match_page(current)
+                    rows.add(await self._parse(Scraper.parse_match_page, content.decode(errors="replace"), current),
+                             current)
+                    self.counter += 1
+
+                except Exception as e:
+                    # Request and parse failures are told apart by whether the page was received
+                    self.failed_extractions.append(current)
+                    if dead_letters is not None and content is None:
+                        dead_letters.add_network_failure(current, e)
+                    elif dead_letters is not None:
+                        dead_letters.add_parse_failure(current, content, "utf-8", e)
+                    print("An exception was raised on: ", current)
+                    print(e)
+                    continue
+
+                if sink is not None and rows.is_full(chunk_size, max_memory_mb):
+                    self._flush_chunk(rows, sink, self.failed_extractions, dead_letters)
+
+        # A fixed pool of workers keeps self.concurrency matches in flight
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        # Write last chunk and return data
+        if sink is not None:
+            frames = self._flush_chunk(rows, sink, self.failed_extractions, dead_letters)
+            sink.close()
+            return frames
+
+        return rows.frames()
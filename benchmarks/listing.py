@@ -0,0 +1,40 @@
+"""
+Compares the regex fast path against the BeautifulSoup tree parser on recorded results listing pages.
+Usage: python -m benchmarks.listing page1.html [page2.html ...]
+"""
+from bs4 import BeautifulSoup
+from scraper.extractor import fast_parse_match_links, Parser
+
+import sys
+import timeit
+
+
+def tree_parse(content: bytes) -> tuple:
+    soup = BeautifulSoup(content.decode(), "html.parser")
+    matches = [Parser.parse_match_links(match) for match in soup.find_all("div", class_="result-con")]
+    pagination = soup.find("span", class_="pagination-data")
+    return matches, (int(pagination.text.split()[-1]) if pagination else None)
+
+
+def main(paths: list[str], number: int = 20) -> None:
+    for path in paths:
+        with open(path, "rb") as file:
+            content = file.read()
+
+        # Both paths must agree before their speed is worth comparing
+        fast = fast_parse_match_links(content)
+        if fast is None:
+            print(path, "fast path validation failed, the tree parser would be used")
+            continue
+        if fast != tree_parse(content):
+            print(path, "fast path output differs from the tree parser")
+            continue
+
+        tree_time = timeit.timeit(lambda: tree_parse(content), number=number) / number
+        fast_time = timeit.timeit(lambda: fast_parse_match_links(content), number=number) / number
+        print("{}: {} matches, tree {:.2f} ms, fast {:.3f} ms, {:.0f}x".format(
+            path, len(fast[0]), tree_time * 1000, fast_time * 1000, tree_time / fast_time))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,238 @@
+"""
+Per function benchmarks of the parsers and DataFrame builders over a corpus of recorded pages, compared against stored
+baselines. Match pages are stored as match-<id>.html and results listing pages as results-<offset>.html.
+
+The committed corpus holds synthetic match pages covering every layout in CASES and one results listing page. The
+committed baselines were measured on a development machine, store your own with --update before comparing timings.
+
+Usage:
+    python -m benchmarks.parsers record <matchid> <matchlink>    store a match page in the corpus
+    python -m benchmarks.parsers record --listing <offset>       store a results listing page in the corpus
+    python -m benchmarks.parsers run --update                    measure and store the baselines
+    python -m benchmarks.parsers run                             measure and fail if a benchmark regressed
+"""
+from bs4 import BeautifulSoup
+from hltvApi import HltvApi
+from scraper.extractor import extract_ids, Parser
+from scraper.scraper import Scraper
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+import requests
+
+CORPUS = os.path.join(os.path.dirname(__file__), "corpus")
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Layouts the parsers handle differently, the corpus should have at least one match page of each
+CASES = ["bo1", "bo3", "bo5", "overtime", "Default", "TBA", "tie", "unplayed decider"]
+
+
+def record(args: argparse.Namespace) -> None:
+    os.makedirs(args.corpus, exist_ok=True)
+    bot = Scraper()
+    if args.listing is not None:
+        html = requests.get(bot.matches + "offset={}".format(args.listing))
+        html.raise_for_status()
+        path = os.path.join(args.corpus, "results-{}.html".format(args.listing))
+    else:
+        html = bot.request_match_page((args.match_id, args.link))
+        path = os.path.join(args.corpus, "match-{}.html".format(args.match_id))
+
+    with open(path, "wb") as file:
+        file.write(html.content)
+    print("Stored", path)
+
+
+def page_cases(soup: BeautifulSoup) -> set:
+    """
+    Returns the CASES present in a match page
+    """
+    cases = set()
+    bestof = re.findall(r"\d", soup.find("div", class_="g-grid maps").div.find("div", class_="preformatted-text").text)
+    if bestof:
+        cases.add("bo" + bestof[0])
+    for mapholder in soup.find_all("div", class_="mapholder"):
+        name = mapholder.find("div", class_="mapname").text
+        if "optional" in mapholder.div["class"]:
+            cases.add("unplayed decider")
+        elif name in ("Default", "TBA"):
+            cases.add(name)
+        elif "tie" in mapholder.find(class_="results-left")["class"]:
+            cases.add("tie")
+        elif len(list(mapholder.find("div", class_="results-center-half-score") or [])) > 11:
+            cases.add("overtime")
+
+    return cases
+
+
+def load_corpus(directory: str) -> dict:
+    """
+    Parses the corpus once and collects the inputs of every benchmark, so only the measured function runs in the loop
+    :return: dict with benchmark name as key and (function, list of inputs) as value, plus the corpus hash and cases
+    :rtype: dict
+    """
+    names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+    digest = hashlib.blake2b(digest_size=16)
+    links, listings, teams, infos, results, stats, matches, summaries = [], [], [], [], [], [], [], []
+    cases = set()
+
+    for name in names:
+        with open(os.path.join(directory, name), "rb") as file:
+            content = file.read()
+        digest.update(name.encode() + content)
+        soup = BeautifulSoup(content.decode(errors="replace"), "html.parser")
+        links.extend(a["href"] for a in soup.find_all("a", href=True))
+
+        if name.startswith("results-"):
+            divs = soup.find_all("div", class_="result-con")
+            listings.extend(divs)
+            summaries.append([Parser.parse_match_summary(div) for div in divs])
+        elif name.startswith("match-"):
+            match_id = int(name[len("match-"):].split(".")[0])
+            teams.extend(soup.find_all("div", class_=re.compile(r"team[0-9]+-gradient"))[:2])
+            infos.append(soup.find("div", class_="g-grid maps").div)
+            results.append(soup.find_all("div", class_="mapholder"))
+            stats.extend(soup.find_all("div", class_="stats-content"))
+            matches.append(Scraper.parse_match_page(content.decode(errors="replace"), (match_id, "")))
+            cases.update(page_cases(soup))
+
+    # players_dataframe is left out until it is implemented
+    api = HltvApi()
+    benchmarks = {"extract_ids": (extract_ids, links),
+                  "parse_match_links": (Parser.parse_match_links, listings),
+                  "parse_team_info": (Parser.parse_team_info, teams),
+                  "parse_match_info": (Parser.parse_match_info, infos),
+                  "parse_results_info": (Parser.parse_results_info, results),
+                  "parse_player_stats": (Parser.parse_player_stats, stats),
+                  "match_dataframe": (api.match_dataframe, matches),
+                  "maps_dataframe": (api.maps_dataframe, matches),
+                  "normalize_matches": (api.normalize_matches, ([matches] if matches else [])),
+                  "summary_dataframe": (api.summary_dataframe, summaries)}
+
+    return {"benchmarks": {k: v for k, v in benchmarks.items() if v[1]}, "corpus": digest.hexdigest(),
+            "cases": cases}
+
+
+def measure(function, inputs: list, repeat: int = 5) -> dict:
+    """
+    Measures the time per call as the best of several autoranged runs and the memory allocated per call (tracemalloc
+    peak above the memory held before the call)
+    :return: dict with keys ["ns_per_op", "alloc_bytes"]
+    :rtype: dict
+    """
+    def loop():
+        for value in inputs:
+            function(value)
+
+    timer = timeit.Timer(loop)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+
+    allocated = 0
+    tracemalloc.start()
+    for value in inputs:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function(value)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {"ns_per_op": best * 1e9 / (number * len(inputs)), "alloc_bytes": allocated / len(inputs)}
+
+
+def run(args: argparse.Namespace) -> None:
+    corpus = load_corpus(args.corpus)
+    if not corpus["benchmarks"]:
+        sys.exit("Corpus {} is empty, store pages with the record command first".format(args.corpus))
+
+    # Baselines are only meaningful if every layout was measured, a new corpus can still be stored with --update
+    missing = [case for case in CASES if case not in corpus["cases"]]
+    if missing and not args.update:
+        sys.exit("Corpus has no match pages with: " + ", ".join(missing))
+    elif missing:
+        print("Corpus has no match pages with:", ", ".join(missing))
+
+    baseline = {}
+    if not args.update:
+        if not os.path.exists(args.baseline):
+            sys.exit("No baselines found in {}, run again with --update to store them".format(args.baseline))
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("corpus") != corpus["corpus"]:
+            sys.exit("Baselines were measured over a different corpus, run again with --update")
+
+    results = {}
+    regressions = []
+    unmeasured = []
+    for name, (function, inputs) in corpus["benchmarks"].items():
+        if args.only and name not in args.only:
+            continue
+        result = results[name] = measure(function, inputs)
+        line = "{:<20} {:>6} inputs {:>14,.0f} ns/op {:>12,.0f} B/op".format(
+            name, len(inputs), result["ns_per_op"], result["alloc_bytes"])
+
+        base = baseline.get("benchmarks", {}).get(name)
+        if base is None and not args.update:
+            unmeasured.append(name)
+            line += "  NO BASELINE"
+        elif base is not None:
+            time_change = result["ns_per_op"] / base["ns_per_op"] - 1
+            alloc_change = (result["alloc_bytes"] / base["alloc_bytes"] - 1 if base["alloc_bytes"] else 0)
+            line += "  {:+.1%} time {:+.1%} alloc".format(time_change, alloc_change)
+            if time_change > args.time_threshold or alloc_change > args.alloc_threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.update:
+        # Benchmarks left out with --only keep their stored baselines if they were measured over the same corpus
+        stored = {}
+        if args.only and os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                previous = json.load(file)
+            if previous.get("corpus") == corpus["corpus"]:
+                stored = previous.get("benchmarks", {})
+
+        with open(args.baseline, "w") as file:
+            json.dump({"corpus": corpus["corpus"], "benchmarks": {**stored, **results}}, file, indent=2)
+        print("Baselines stored in", args.baseline)
+
+    if regressions:
+        sys.exit("Regressed past the thresholds: " + ", ".join(regressions))
+    if unmeasured:
+        sys.exit("No baselines for: " + ", ".join(unmeasured) + ", run again with --update to store them")
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="benchmarks.parsers", description="Parser micro-benchmarks")
+    parser.add_argument("--corpus", default=CORPUS, help="directory with the recorded pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("record", help="store a match or results listing page in the corpus")
+    command.add_argument("match_id", nargs="?", type=int, help="match id number")
+    command.add_argument("link", nargs="?", help="match link, e.g. /matches/2346512/team-a-vs-team-b-event")
+    command.add_argument("--listing", type=int, help="offset of a results listing page instead of a match")
+    command.set_defaults(function=record)
+
+    command = commands.add_parser("run", help="measure every benchmark and compare it against the baselines")
+    command.add_argument("--baseline", default=BASELINE, help="baselines json file")
+    command.add_argument("--update", action="store_true", help="store the measured values as the new baselines")
+    command.add_argument("--time-threshold", type=float, default=0.15, help="allowed ns/op increase, 0.15 is 15%%")
+    command.add_argument("--alloc-threshold", type=float, default=0.05, help="allowed B/op increase")
+    command.add_argument("--only", nargs="*", help="benchmark names to run")
+    command.set_defaults(function=run)
+
+    args = parser.parse_args(argv)
+    if args.command == "record" and args.listing is None and (args.match_id is None or args.link is None):
+        parser.error("record needs a match id and link, or --listing")
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
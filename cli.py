@@ -0,0 +1,202 @@
+"""
+Command line runner for HltvApi, usage: python cli.py {teams,sync,backfill,retry,serve} [options]
+
+Heavy modules (pandas, bs4, requests) are imported inside the subcommands that need them, so short cron jobs start
+fast and commands that only enumerate links never import pandas.
+"""
+from datetime import date, timedelta
+
+import argparse
+import sys
+import time
+
+
+class Progress:
+    """
+    Prints a single updating line with processed and failed matches, throughput and ETA
+    """
+
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.start = time.time()
+
+    def __call__(self, processed: int, failed: int, remaining: int) -> None:
+        elapsed = time.time() - self.start
+        done = processed + failed
+        rate = (done / elapsed if elapsed > 0 else 0)
+        eta = (timedelta(seconds=int(remaining / rate)) if rate > 0 else "?")
+        self.stream.write("\r{} processed, {} failed, {} remaining | {:.2f} matches/s | ETA {}   ".format(
+            processed, failed, remaining, rate, eta))
+        if remaining == 0:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def make_sink(args: argparse.Namespace):
+    if args.sink is None:
+        return None
+
+    import sinks
+    return {"csv": sinks.CsvSink, "sqlite": sinks.SqliteSink, "parquet": sinks.ParquetSink}[args.sink](args.out)
+
+
+def make_dead_letters(args: argparse.Namespace):
+    if args.dead_letters is None:
+        return None
+
+    from deadletter import DeadLetterQueue
+    return DeadLetterQueue(args.dead_letters)
+
+
+def make_validator(args: argparse.Namespace):
+    if args.quarantine is None:
+        return None
+
+    from sinks import CsvSink
+    from validation import FrameValidator
+    return FrameValidator(quarantine=CsvSink(args.quarantine))
+
+
+def collect_matches(args: argparse.Namespace) -> list[tuple]:
+    """
+    Enumerates the (id, link) tuples requested by the command line options with the Scraper only, without duplicates
+    """
+    from scraper.scraper import Scraper
+
+    bot = Scraper()
+    matches = {}
+
+    teams = list(args.team or [])
+    if getattr(args, "top_teams", False):
+        teams.extend(bot.get_teamids())
+    for team in teams:
+        for match in bot.get_matches_teamid(str(team), limit=args.limit, fast=True):
+            matches[match[0]] = match
+
+    if args.event or args.start or args.end:
+        for match in bot.get_matches_daterange(args.start, args.end, eventids=args.event, fast=True):
+            matches[match[0]] = match
+
+    if getattr(args, "last", None):
+        for match in bot.get_last_matches(limit=args.last, fast=True):
+            matches[match[0]] = match
+
+    return list(matches.values())
+
+
+def run_queue(args: argparse.Namespace, matches: list[tuple]) -> None:
+    from hltvApi import HltvApi
+
+    HltvApi().start_matches_queue(matches, sink=make_sink(args), chunk_size=args.chunk_size,
+                                  max_memory_mb=args.max_memory_mb, dead_letters=make_dead_letters(args),
+                                  progress=Progress(), validator=make_validator(args))
+
+
+def teams(args: argparse.Namespace) -> None:
+    from scraper.scraper import Scraper
+
+    for team_id in Scraper().get_teamids():
+        print(team_id)
+
+
+def sync(args: argparse.Namespace) -> None:
+    today = date.today()
+    args.start = (today - timedelta(days=args.days)).isoformat()
+    args.end = today.isoformat()
+    args.team = None
+    matches = collect_matches(args)
+
+    if args.links_only:
+        for match_id, link in matches:
+            print(match_id, link)
+        return
+
+    run_queue(args, matches)
+
+
+def backfill(args: argparse.Namespace) -> None:
+    if not (args.team or args.top_teams or args.event or args.start or args.end or args.last):
+        sys.exit("backfill needs at least one of --team, --top-teams, --event, --start, --end or --last")
+
+    matches = collect_matches(args)
+    print(len(matches), "matches to process", file=sys.stderr)
+    if args.links_only:
+        for match_id, link in matches:
+            print(match_id, link)
+        return
+
+    run_queue(args, matches)
+
+
+def retry(args: argparse.Namespace) -> None:
+    from deadletter import DeadLetterQueue
+
+    DeadLetterQueue(args.dead_letters).retry_parse(sink=make_sink(args))
+
+
+def serve(args: argparse.Namespace) -> None:
+    from archive import MatchArchive
+    from service import MatchService, serve as run_server
+
+    archive = (MatchArchive(args.archive) if args.archive else None)
+    run_server(MatchService(archive=archive, capacity=args.capacity, listing_ttl=args.listing_ttl),
+               args.host, args.port)
+
+
+def add_queue_options(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sink", choices=["csv", "sqlite", "parquet"], help="where processed rows are written")
+    parser.add_argument("--out", default="hltv_data", help="sink directory or database file")
+    parser.add_argument("--dead-letters", help="directory where failed matches are stored")
+    parser.add_argument("--quarantine", help="directory where rows that don't fit the database schema are stored")
+    parser.add_argument("--chunk-size", type=int, default=500, help="matches per flushed chunk")
+    parser.add_argument("--max-memory-mb", type=float, help="flush once stored rows take this many megabytes")
+    parser.add_argument("--links-only", action="store_true", help="only print (id, link) pairs, pandas is not used")
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="hltv", description="Scrape HLTV match data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("teams", help="print the top 30 team ids").set_defaults(function=teams)
+
+    command = commands.add_parser("sync", help="process the matches played in the last days")
+    command.add_argument("--days", type=int, default=1, help="number of days to look back")
+    command.add_argument("--event", type=int, nargs="*", help="only matches of these event ids")
+    add_queue_options(command)
+    command.set_defaults(function=sync, limit=None, last=None)
+
+    command = commands.add_parser("backfill", help="process historical matches")
+    command.add_argument("--team", type=int, nargs="*", help="matches of these team ids")
+    command.add_argument("--top-teams", action="store_true", help="matches of the current top 30 teams")
+    command.add_argument("--event", type=int, nargs="*", help="matches of these event ids")
+    command.add_argument("--start", help="first day to include, YYYY-MM-DD")
+    command.add_argument("--end", help="last day to include, YYYY-MM-DD")
+    command.add_argument("--last", type=int, help="last N matches posted on HLTV")
+    command.add_argument("--limit", type=int, help="max matches per team")
+    add_queue_options(command)
+    command.set_defaults(function=backfill)
+
+    command = commands.add_parser("retry", help="parse again the stored pages of a dead letter queue")
+    command.add_argument("--dead-letters", default="dead_letters", help="dead letter queue directory")
+    command.add_argument("--sink", choices=["csv", "sqlite", "parquet"], help="where recovered rows are written")
+    command.add_argument("--out", default="hltv_data", help="sink directory or database file")
+    command.set_defaults(function=retry)
+
+    command = commands.add_parser("serve", help="serve parsed matches over local HTTP/JSON")
+    command.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    command.add_argument("--port", type=int, default=8080, help="port to listen on")
+    command.add_argument("--archive", help="match archive file where parsed matches are stored and read from")
+    command.add_argument("--capacity", type=int, default=1024, help="responses kept in memory")
+    command.add_argument("--listing-ttl", type=float, default=300, help="seconds a team listing is served from memory")
+    command.set_defaults(function=serve)
+
+    args = parser.parse_args(argv)
+    # Processed rows only live in memory until they are flushed, without a sink they would be thrown away
+    if args.command in ("sync", "backfill", "retry") and args.sink is None and not getattr(args, "links_only", False):
+        parser.error("{} needs --sink to store the processed rows{}".format(
+            args.command, (", or --links-only" if hasattr(args, "links_only") else "")))
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from collections import deque
+from hltvApi import HltvApi, MatchRows
+from sinks import Sink
+
+import gzip
+import json
+import os
+import time
+import traceback
+import pandas as pd
+
+
+class DeadLetterQueue:
+    """
+    Stores the matches that failed in start_matches_queue classified by cause. Network failures only keep the match so
+    it can be requested again, parse failures also keep the response bytes and the traceback so the parse step can be
+    retried from disk once the extractor is fixed, without requesting the page again.
+
+    Layout inside the directory:
+        network.jsonl               one record per network failure or match of a chunk that could not be written
+        parse/<matchid>.html.gz     compressed response bytes of a page that failed to parse
+        parse/<matchid>.json        match tuple, encoding, traceback and time of the parse failure
+    """
+
+    def __init__(self, directory: str = "dead_letters"):
+        self.directory = directory
+        self.parse_directory = os.path.join(directory, "parse")
+        self.network_path = os.path.join(directory, "network.jsonl")
+        os.makedirs(self.parse_directory, exist_ok=True)
+
+    def add_network_failure(self, match_id: tuple, error: Exception) -> None:
+        """
+        Records a match whose page could not be requested
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :param error: exception raised by the request
+        :type error: Exception
+        """
+        with open(self.network_path, "a") as file:
+            file.write(json.dumps({"match": list(match_id), "error": repr(error), "time": time.time()}) + "\n")
+
+    def add_parse_failure(self, match_id: tuple, content: bytes, encoding: str, error: Exception) -> None:
+        """
+        Stores the response bytes and traceback of a match page that could not be parsed or normalized
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :param content: raw bytes of the match page
+        :type content: bytes
+        :param encoding: encoding used to decode the page
+        :type encoding: str
+        :param error: exception raised while parsing
+        :type error: Exception
+        """
+        base = os.path.join(self.parse_directory, str(match_id[0]))
+        with gzip.open(base + ".html.gz", "wb") as file:
+            file.write(content)
+        with open(base + ".json", "w") as file:
+            json.dump({"match": list(match_id),
+                       "encoding": encoding,
+                       "error": repr(error),
+                       "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+                       "time": time.time()}, file)
+
+    def network_failures(self, clear: bool = False) -> deque:
+        """
+        Returns the matches that failed with network errors, ready to be passed again to start_matches_queue
+        :param clear: if True, the network failures file is removed after reading it
+        :type clear: bool
+        :return: deque with tuples in format (matchid, matchlink), without duplicates
+        :rtype: deque
+        """
+        if not os.path.exists(self.network_path):
+            return deque()
+
+        with open(self.network_path) as file:
+            matches = {}
+            for line in file:
+                record = json.loads(line)
+                matches[record["match"][0]] = tuple(record["match"])
+
+        if clear:
+            os.remove(self.network_path)
+
+        return deque(matches.values())
+
+    def parse_failures(self) -> list[dict]:
+        """
+        Returns the records of the stored parse failures
+        :return: list of dicts with keys ["match", "encoding", "error", "traceback", "time"]
+        :rtype: list[dict]
+        """
+        records = []
+        for name in sorted(os.listdir(self.parse_directory)):
+            if name.endswith(".json"):
+                with open(os.path.join(self.parse_directory, name)) as file:
+                    records.append(json.load(file))
+
+        return records
+
+    def retry_parse(self, api: HltvApi = None, sink: Sink = None) -> list[pd.DataFrame]:
+        """
+        Runs the parse and normalization steps again over the stored response bytes, no request is made. Matches that
+        succeed are removed from the queue once their rows were built (and written to the sink if provided), while the
+        ones that fail again get their traceback updated
+        :param api: HltvApi instance used to parse and normalize the pages
+        :type api: HltvApi
+        :param sink: if provided, the recovered rows are also written to it
+        :type sink: Sink
+        :return: list of DataFrames with the recovered matches, same as start_matches_queue
+        :rtype: list of DataFrames
+        """
+        api = (api if api is not None else HltvApi())
+        rows = MatchRows(api)
+        recovered = []
+
+        for record in self.parse_failures():
+            match_id = tuple(record["match"])
+            base = os.path.join(self.parse_directory, str(match_id[0]))
+            with gzip.open(base + ".html.gz", "rb") as file:
+                content = file.read()
+
+            try:
+                rows.add(api.parse_match_page(content.decode(record["encoding"] or "utf-8", errors="replace"),
+                                              match_id), match_id)
+            except Exception as e:
+                print("Parse failed again on: ", match_id)
+                print(e)
+                self.add_parse_failure(match_id, content, record["encoding"], e)
+                continue
+
+            recovered.append(base)
+
+        # Stored pages are only removed after the frames were built and written, an exception keeps them all queued
+        if sink is not None:
+            frames = rows.flush(sink)
+            sink.close()
+        else:
+            frames = rows.frames()
+
+        for base in recovered:
+            os.remove(base + ".html.gz")
+            os.remove(base + ".json")
+        print("RECOVERED MATCHES: ", len(recovered))
+
+        return frames
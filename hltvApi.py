@@ -1,12 +1,17 @@
 from abc import abstractmethod
 from scraper import scraper
+from scraper.cache import EntityCache
+from scraper.ratelimit import RateLimiter
 from collections import deque
-from typing import Union
+from typing import Callable, Union
+from sinks import Sink, MAP_TABLE_NAMES
+from scheduler import MatchScheduler
 
 import requests
 import pandas as pd
 import time
 import pickle
+import sys
 
 
 class HltvApi(scraper.Scraper):
@@ -16,22 +21,55 @@ class HltvApi(scraper.Scraper):
     will be done in this class
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, limiter: RateLimiter = None):
+        """
+        :param limiter: rate limit applied to every request, defaults to the one shared by all scrapers in the process
+        :type limiter: RateLimiter
+        """
+        super().__init__(limiter)
         self.counter = 0
 
         # Normalized fact tables column names
         self.match_cols = ["matchid", "bestof", "instance", "eventid", "lan", "date", "team1id", "team2id", "winnerid"]
         self.map_cols = ["mapid", "matchid", "teamid", "map", "score", "enemy_score", "ct_result", "t_result",
-                         "overtime", "won", "pick"],
+                         "overtime", "won", "pick"]
         self.player_cols = ["mapId", "teamid", "matchId", "playerid", "map", "ct_kills", "ct_deaths", "ct_adr",
                             "t_kills", "t_deaths", "t_adr"]
 
+        # Normalized fact tables column types, applied once per column by MatchRows. Integer types are nullable so a
+        # malformed value of one match becomes a missing value instead of failing the whole chunk
+        self.match_dtypes = {"matchid": "Int64", "bestof": "Int8", "eventid": "Int64", "lan": "Int8",
+                             "team1id": "Int64", "team2id": "Int64", "winnerid": "Int64"}
+        self.map_dtypes = {"mapid": "Int64", "matchid": "Int64", "teamid": "Int64", "score": "Int16",
+                           "enemy_score": "Int16", "ct_result": "Int16", "t_result": "Int16", "overtime": "Int8",
+                           "won": "Int8", "pick": "Int8"}
+        self.player_dtypes = {"mapId": "Int64", "teamid": "Int64", "matchId": "Int64", "playerid": "Int64",
+                              "ct_kills": "Int16", "ct_deaths": "Int16", "ct_adr": "float64", "t_kills": "Int16",
+                              "t_deaths": "Int16", "t_adr": "float64"}
+
         # Denormalized DataFrame column names
         self.df_match_cols = ["match_id", "date", "t1_id", "t1_name", "t2_id", "t2_name", "t1_score", "t2_score",
                               "winner", "event_id", "event_name", "instance", "best_of", "lan"]
         self.df_map_cols = ["mapId", "matchId", "t1_id", "t1_name", "t2_id", "t2_name", "map", "t1_result", "t2_result",
                             "t1_ct_score", "t1_t_score", "t2_ct_score", "t2_t_score", "winner", "overtime", "picked_by"]
+        self.df_summary_cols = ["match_id", "link", "date", "team1", "team2", "t1_score", "t2_score", "winner",
+                                "event_name", "format"]
+        self.df_entity_cols = {"event": ["name", "start_date", "end_date", "location", "prize_pool", "teams", "tier"],
+                               "team": ["name", "country", "ranking", "players"],
+                               "player": ["nick", "name", "country", "age", "team_id"]}
+
+        # Map stats fact tables column names and types, linked to MapsFact by (mapid, teamid)
+        self.map_team_cols = ["mapid", "teamid", "first_kills", "clutches", "rating"]
+        self.round_cols = ["mapid", "round", "teamid", "outcome"]
+        self.map_player_cols = ["mapid", "teamid", "playerid", "kills", "headshots", "assists", "flash_assists",
+                                "deaths", "kast", "adr", "fk_diff", "rating"]
+        self.map_team_dtypes = {"mapid": "int64", "teamid": "int64", "first_kills": "Int16", "clutches": "Int16",
+                                "rating": "float32"}
+        self.round_dtypes = {"mapid": "int64", "round": "int16", "teamid": "int64", "outcome": "category"}
+        self.map_player_dtypes = {"mapid": "int64", "teamid": "int64", "playerid": "int64", "kills": "Int16",
+                                  "headshots": "Int16", "assists": "Int16", "flash_assists": "Int16",
+                                  "deaths": "Int16", "kast": "float32", "adr": "float32", "fk_diff": "Int16",
+                                  "rating": "float32"}
 
     def match_dataframe(self, mdict: Union[dict, list[dict]]) -> pd.DataFrame:
         """
@@ -77,6 +115,39 @@ class HltvApi(scraper.Scraper):
 
         return pd.DataFrame(container, columns=self.df_match_cols)
 
+    def summary_dataframe(self, summaries: list[dict]) -> pd.DataFrame:
+        """
+        Receives the list of dictionaries returned by get_last_matches or get_matches_teamid with summary=True and
+        puts the series level results into a DataFrame. No match page is requested to build it.
+        :param summaries: match summary dictionaries returned by Parser.parse_match_summary
+        :type summaries: list[dict]
+        :return: DataFrame with self.df_summary_cols columns
+        :rtype: pd.DataFrame
+        """
+        df = pd.DataFrame(summaries, columns=self.df_summary_cols)
+        df["date"] = pd.to_datetime(df["date"])
+
+        return df
+
+    def enrich_dataframe(self, kind: str, ids: list, cache: EntityCache = None, max_workers: int = 4) -> pd.DataFrame:
+        """
+        Obtains the details of the events, teams or players referenced by a dimension DataFrame, for example the
+        EventDim index returned by start_matches_queue. See Scraper.get_entities for caching and coalescing
+        :param kind: "event", "team" or "player"
+        :type kind: str
+        :param ids: entity ids
+        :type ids: list
+        :param cache: persistent cache shared between runs
+        :type cache: EntityCache
+        :param max_workers: number of pages requested at the same time
+        :type max_workers: int
+        :return: DataFrame indexed by entity id with self.df_entity_cols[kind] columns
+        :rtype: pd.DataFrame
+        """
+        entities = self.get_entities(kind, ids, cache, max_workers)
+
+        return pd.DataFrame.from_dict(entities, orient="index", columns=self.df_entity_cols[kind])
+
     def maps_dataframe(self, mdict: Union[dict, list[dict]]) -> pd.DataFrame:
         """
         Receives a dict or a list of dictionaries obtained with extract_match_info method and extracts all relevant
@@ -140,81 +211,45 @@ class HltvApi(scraper.Scraper):
         # Implementation pending
         ...
 
+    def normalize_matches(self, matches: list[dict]) -> list[pd.DataFrame]:
+        """
+        Normalizes a batch of dictionaries returned by request_match_info into the typed DataFrames returned by
+        start_matches_queue. Type conversion is done once per column instead of once per row, which makes it the
+        preferred way to normalize many matches over the row level process_* methods
+        :param matches: match dictionaries returned by request_match_info method
+        :type matches: list[dict]
+        :return: list of DataFrames with team, event, player, match, map and player stats information
+        :rtype: list of DataFrames
+        """
+        rows = MatchRows(self)
+        for match in matches:
+            rows.add(match)
+
+        return rows.frames()
+
     @abstractmethod
     def process_match(self, mdict: dict) -> list:
         """
-        Takes a dictionary with match information and parses it to normalize data for a match Fact Table row
+        Takes a dictionary with match information and parses it to normalize data for a match Fact Table row. Rows are
+        built by normalize_matches so they always match the start_matches_queue output
         :param mdict: match dictionary returned by request_match_info method
         :type mdict: dict
         :return: list with data extracted from the dictionary
         :rtype: list
         """
-        container = []
-        match = mdict["match_info"]
-        container.append(match["match_id"])
-        container.append(match["bestof"])
-        container.append(match["instance"])
-        container.append(match["event_id"])
-        container.append((1 if match["lan"] is True else 0))
-        container.append(pd.to_datetime(match["date"]))
-        container.append(mdict["team1"]["id"])
-        container.append(mdict["team2"]["id"]),
-        container.append((mdict["team1"]["id"] if mdict["team1"]["won"] is True else mdict["team2"]["id"]))
-
-        return container
+        return self.normalize_matches([mdict])[3].iloc[0].tolist()
 
     @abstractmethod
     def process_results(self, mdict: dict) -> list:
         """
-        Takes a dictionary with match information and parses it to normalize data for a map table row
+        Takes a dictionary with match information and parses it to normalize data for a map table row, one row per
+        team and played map
         :param mdict: match dictionary returned by request_match_info method
         :type mdict: dict
         :return: list with data extracted from the dictionary
         :rtype: list
         """
-        container = []
-
-        for key, dct in mdict["map_results"].items():
-            # If a map wasn't played because a team won before, there is a null dictionary
-            if dct is None or key == "Default":
-                continue
-
-            else:
-                # Make map entry for team 1
-                container.append(
-                    [
-                        dct["mapID"],
-                        mdict["match_info"]["match_id"],
-                        mdict["team1"]["id"],
-                        key,
-                        dct["first_team"]["score"],
-                        dct["second_team"]["score"],
-                        dct["first_team"]["round_results"][0][1],  # ct round score
-                        dct["first_team"]["round_results"][1][1],  # t round score
-                        dct["overtime"],
-                        dct["first_team"]["won"],
-                        dct["first_team"]["pick"]
-                    ]
-                )
-                # Make map entry for team 2
-                container.append(
-                    [
-                        dct["mapID"],
-                        mdict["match_info"]["match_id"],
-                        mdict["team2"]["id"],
-                        key,
-                        dct["second_team"]["score"],
-                        dct["first_team"]["score"],
-                        dct["second_team"]["round_results"][0][1],
-                        dct["second_team"]["round_results"][1][1],
-                        dct["overtime"],
-                        dct["second_team"]["won"],
-                        dct["second_team"]["pick"],
-
-                    ]
-                )
-
-            return container
+        return self.normalize_matches([mdict])[4].values.tolist()
 
     @abstractmethod
     def process_players(self, mdict: dict, player_container: dict = None) -> list:
@@ -222,106 +257,91 @@ class HltvApi(scraper.Scraper):
         Takes a dictionary with match information and parses it to normalize data for a player stats table row
         :param mdict: match dictionary returned by request_match_info method
         :type mdict: dict
-        :param player_container: container for all player dim information 
+        :param player_container: container for all player dim information, players not stored yet are added to it
         :type player_container: dict
-        :return: list with data extracted from the dictionary
+        :return: list with data extracted from the dictionary, None if the match was forfeit and has no player stats
         :rtype: list
         """
         # Player stats can be null if match was forfeit and no map was played
-        if mdict["player_stats"] is not None:
-            container = []
-            # Extract and prepare player stats info
-            for key, dct in mdict["player_stats"].items():
-                # Global stats contain player dimension table data (id, nick, name, nationality)
-                if key == "global_stats" and isinstance(player_container, dict):
-                    for team in mdict["player_stats"]["global_stats"].values():
-                        for player in team.keys():
-                            # Verify player is not stored in player dimension already
-                            if team[player]["playerID"] not in player_container:
-                                # Add player row to player dimension
-                                player_container[team[player]["playerID"]] = [
-                                    team[player]["playerName"],
-                                    player,
-                                    team[player]["nationality"]
-                                ]
-                # The rest contain player game statistics (kills, deaths, damage)
-                elif key != "global_stats":
-                    for player, stats in dct["first_team"].items():
-                        container.append(
-                            [mdict["map_results"][key]["mapID"],
-                             mdict["team1"]["id"],
-                             mdict["match_info"]["match_id"],
-                             stats["playerID"],
-                             key,
-                             int(stats["ct"]["kd"].split("-")[0]),
-                             int(stats["ct"]["kd"].split("-")[1]),
-                             stats["ct"]["adr"],
-                             int(stats["t"]["kd"].split("-")[0]),
-                             int(stats["t"]["kd"].split("-")[1]),
-                             stats["t"]["adr"],
-                             ]
-                        )
-                    for player, stats in dct["second_team"].items():
-                        container.append(
-                            [mdict["map_results"][key]["mapID"],
-                             mdict["team2"]["id"],
-                             mdict["match_info"]["match_id"],
-                             stats["playerID"],
-                             key,
-                             int(stats["ct"]["kd"].split("-")[0]),
-                             int(stats["ct"]["kd"].split("-")[1]),
-                             stats["ct"]["adr"],
-                             int(stats["t"]["kd"].split("-")[0]),
-                             int(stats["t"]["kd"].split("-")[1]),
-                             stats["t"]["adr"],
-                             ]
-                        )
-            return container
-        else:
-            pass
+        if mdict["player_stats"] is None:
+            return None
+
+        frames = self.normalize_matches([mdict])
+        if isinstance(player_container, dict):
+            for player_id, row in zip(frames[2].index, frames[2].values.tolist()):
+                player_container.setdefault(player_id, row)
 
-    def start_matches_queue(self, matches: Union[list[tuple], deque]) -> list[pd.DataFrame]:
+        return frames[5].values.tolist()
+
+    def start_matches_queue(self, matches: Union[list[tuple], deque, MatchScheduler], sink: Sink = None,
+                            chunk_size: int = 500, max_memory_mb: float = None, limit: Union[int, None] = None,
+                            dead_letters=None, progress: Callable[[int, int, int], None] = None,
+                            validator=None) -> list[pd.DataFrame]:
         """
         This method starts a deque object with a list or receives one that contains tuples (matchid, matchlink) and
         iterates over them to return matches, maps, players, teams and events information in a list of normalized
         dataframes ready for insertion into the Data Warehouse.
-        :param matches: matches container with tuples in format (teamid, matchlink)
-        :type matches: list, deque
-        :return: list of DataFrames with match, map, player, team and event information
+        If a sink is provided, accumulated rows are written to it every chunk_size matches or once they take around
+        max_memory_mb megabytes, and the containers are cleared so memory stays constant for the whole queue.
+        :param matches: matches container with tuples in format (teamid, matchlink), a MatchScheduler decides the
+                        processing order by priority class and deadline
+        :type matches: list, deque, MatchScheduler
+        :param sink: destination for the flushed chunks (CsvSink, SqliteSink, ParquetSink)
+        :type sink: Sink
+        :param chunk_size: number of processed matches that triggers a flush to the sink
+        :type chunk_size: int
+        :param max_memory_mb: approximate size in megabytes of the stored rows that triggers a flush to the sink
+        :type max_memory_mb: float
+        :param limit: max number of matches processed by this instance before pickling the pending queue. Defaults to
+                      500 when there is no sink, since every row is kept in memory, and to the whole queue when rows
+                      are flushed to a sink
+        :type limit: int, None
+        :param dead_letters: if provided, failed matches are recorded in it as network or parse failures, parse
+                             failures keep the response bytes so they can be retried with DeadLetterQueue.retry_parse
+        :type dead_letters: DeadLetterQueue
+        :param progress: function called after every match with (processed, failed, remaining), replaces the per
+                         match prints
+        :type progress: Callable
+        :param validator: if provided, every chunk is checked against the database schema before it is written and
+                          the offending rows are quarantined
+        :type validator: FrameValidator
+        :return: list of DataFrames with match, map, player, team and event information, when a sink is used only the
+                 last chunk is returned (it is also written to the sink)
         :rtype: list of DataFrames
         """
         # Create matches container
         if isinstance(matches, list):
             match_container = deque(matches)
-        elif isinstance(matches, deque):
+        elif isinstance(matches, (deque, MatchScheduler)):
             match_container = matches
         else:
             raise TypeError("Please provide a valid match list to iterate over")
 
-        # Start containers for data, dicts for players, team and event data to eval if an element is in the dict faster
+        # Without a sink every row stays in memory until the queue ends
+        if limit is None and sink is None:
+            limit = 500
+
+        # Start containers for failed matches and for the normalized rows of processed matches
         failed_extractions = deque()
-        player_dim_rows = {}
-        team_rows = {}
-        event_rows = {}
-        match_rows = []
-        map_rows = []
-        player_rows = []
+        rows = MatchRows(self, validator)
 
-        # Counter to prevent too many api requests and aggregate time taken
-        sleeping_time = 1
+        # Aggregate time taken, requests are throttled by self.limiter
         agg = 0
 
         # Create requests session
         session = requests.Session()
 
+        # Per match prints are only shown if there is no progress function
+        log = (print if progress is None else (lambda *args: None))
+        first_counter = self.counter
+
         # Loop over matches
         while len(match_container) > 0:
-            # Limit to 15 requests and 15 seconds sleep
-            if (sleeping_time % 15) == 0:
-                time.sleep(15)
+            if progress is not None:
+                progress(self.counter - first_counter, len(failed_extractions), len(match_container))
 
             # Mechanism to interrupt the loop
-            if self.counter >= 500:
+            if limit is not None and self.counter >= limit:
                 with open("pending_matches", "wb") as file:
                     pickle.dump(match_container, file)
                 with open("failed_matches", "wb") as file:
@@ -329,68 +349,464 @@ class HltvApi(scraper.Scraper):
 
                 break
 
+            # Write chunk to the sink once enough matches or memory were accumulated
+            if sink is not None and rows.is_full(chunk_size, max_memory_mb):
+                self._flush_chunk(rows, sink, failed_extractions, dead_letters)
+
             # Extract and request match data while measuring time taken
             current = match_container.pop()
-            print("PROCESSING MAP: ", current)
+            log("PROCESSING MAP: ", current)
             start = time.time()
 
+            # Request and parse steps are handled apart so failures can be classified as network or parse errors
             try:
-                match = self.request_match_info(current, session)
-
-                # Process team data into container
-                if match["team1"]["id"] not in team_rows:
-                    team_rows[match["team1"]["id"]] = match["team1"]["name"]
-                if match["team2"]["id"] not in team_rows:
-                    team_rows[match["team2"]["id"]] = match["team2"]["name"]
+                html = self.request_match_page(current, session)
 
-                # Process event data into container
-                if match["event"]["id"] not in event_rows:
-                    event_rows[match["event"]["id"]] = match["event"]["name"]
+            except Exception as e:
+                failed_extractions.append(current)
+                if dead_letters is not None:
+                    dead_letters.add_network_failure(current, e)
+                print("*" * 10)
+                print("A network exception was raised on: ", current)
+                print(e)
+                print("*" * 10)
 
-                # Append match, map and player stats rows to containers
-                match_rows.append(self.process_match(match))
+                continue
 
-                # Map results can be null if match was forfeit and no map was played
-                map_results = self.process_results(match)
-                if map_results:
-                    for x in map_results:
-                        map_rows.append(x)
+            try:
+                match = self.parse_match_page(html.text, current)
 
-                # Player stats can also be null if match was forfeit and no map was played
-                player_results = self.process_players(match, player_dim_rows)
-                if player_results:
-                    for x in player_results:
-                        player_rows.append(x)
+                # Normalize match into team, event, player, match, map and player stats rows
+                rows.add(match, current)
 
                 # Once finished processing match info, continue looping
-                sleeping_time += 1
                 finish = time.time() - start
                 agg += finish
                 self.counter += 1
-                print("PROCCESING TIME: ", finish)
-                print("---" * 10)
+                log("PROCCESING TIME: ", finish)
+                log("---" * 10)
 
             except Exception as e:
-                # If an exception was raised, add match to failed extractions
+                # If an exception was raised, add match to failed extractions keeping the page to parse it again later
                 failed_extractions.append(current)
+                if dead_letters is not None:
+                    dead_letters.add_parse_failure(current, html.content, html.encoding, e)
                 print("*" * 10)
-                print("An exception was raised on: ", current)
+                print("A parse exception was raised on: ", current)
                 print(e)
                 print("*" * 10)
 
                 continue
 
-        # Return data
-        playerstats_df = pd.DataFrame(player_rows, columns=self.player_cols)
-        maps_df = pd.DataFrame(map_rows, columns=self.map_cols)
-        match_df = pd.DataFrame(match_rows, columns=self.match_cols)
-
-        return [
-            pd.DataFrame.from_dict(team_rows, orient="index", columns=['teamName']),
-            pd.DataFrame.from_dict(event_rows, orient="index", columns=['eventName']),
-            pd.DataFrame.from_dict(player_dim_rows, orient="index", columns=['playerName', 'playerNick',
-                                                                             'nationality']),
-            match_df,
-            maps_df,
-            playerstats_df
+        if progress is not None:
+            progress(self.counter - first_counter, len(failed_extractions), len(match_container))
+
+        # Write last chunk and return data
+        if sink is not None:
+            frames = self._flush_chunk(rows, sink, failed_extractions, dead_letters)
+            sink.close()
+            return frames
+
+        return rows.frames()
+
+    @staticmethod
+    def _flush_chunk(rows: "MatchRows", sink: Sink, failed_extractions: deque, dead_letters=None) -> list[pd.DataFrame]:
+        """
+        Writes a chunk to the sink. If the chunk can't be built or written its matches are added to the failed
+        extractions and the dead letter queue, so they are requested again instead of being lost
+        :return: list of DataFrames written to the sink, empty ones if the chunk failed
+        :rtype: list of DataFrames
+        """
+        try:
+            return rows.flush(sink)
+        except Exception as e:
+            print("*" * 10)
+            print("A chunk could not be written: ", rows.matches, " matches")
+            print(e)
+            print("*" * 10)
+            for current in rows.clear():
+                failed_extractions.append(current)
+                if dead_letters is not None:
+                    dead_letters.add_network_failure(current, e)
+
+            return rows.frames()
+
+    def start_mapstats_queue(self, map_ids: Union[list, pd.DataFrame], sink: Sink = None, chunk_size: int = 500,
+                             cache: EntityCache = None, max_workers: int = 4,
+                             exclude: Union[list, set] = None) -> list[pd.DataFrame]:
+        """
+        Requests the mapstatsid pages of already processed maps and normalizes team stats, round history and player
+        scoreboards into three fact tables linked to MapsFact by (mapid, teamid). Pages are requested concurrently
+        chunk_size ids at a time and, if a sink is provided, every chunk is written to it under sinks.MAP_TABLE_NAMES
+        and cleared, so memory stays constant for the whole archive.
+        Runs are incremental: maps already written to the sink (its MapTeamsFact mapid column) and ids passed in exclude
+        are skipped, and pages with a fresh entry in the cache are not requested again. Maps that could not be
+        extracted or written are kept in self.failed_maps so they can be passed again.
+        :param map_ids: map ids, or the MapsFact DataFrame returned by start_matches_queue (its mapid column is used)
+        :type map_ids: list, pd.DataFrame
+        :param sink: destination for the flushed chunks (CsvSink, SqliteSink, ParquetSink)
+        :type sink: Sink
+        :param chunk_size: number of maps requested and flushed together
+        :type chunk_size: int
+        :param cache: persistent cache shared between runs
+        :type cache: EntityCache
+        :param max_workers: number of pages requested at the same time
+        :type max_workers: int
+        :param exclude: map ids that are already stored and must not be processed
+        :type exclude: list, set
+        :return: list of DataFrames ordered as sinks.MAP_TABLE_NAMES, when a sink is used only the last chunk is
+                 returned (it is also written to the sink)
+        :rtype: list of DataFrames
+        """
+        map_ids = self._pending_maps(map_ids, sink, exclude)
+        self.failed_maps = []
+
+        rows = MapStatsRows(self)
+        frames = rows.frames()
+        for i in range(0, len(map_ids), chunk_size):
+            chunk = map_ids[i:i + chunk_size]
+            self._add_map_stats(rows, chunk, self.get_entities("mapstats", chunk, cache, max_workers))
+
+            print("PROCESSED MAPS: ", min(i + chunk_size, len(map_ids)), "/", len(map_ids))
+            if sink is not None:
+                frames = self._flush_map_chunk(rows, sink)
+
+        if sink is not None:
+            sink.close()
+            return frames
+
+        return rows.frames()
+
+    @staticmethod
+    def _pending_maps(map_ids: Union[list, pd.DataFrame], sink: Sink = None, exclude: Union[list, set] = None) -> list:
+        """
+        Returns the map ids of start_mapstats_queue without duplicates, excluded ids or maps already in the sink
+        """
+        if isinstance(map_ids, pd.DataFrame):
+            map_ids = map_ids["mapid"]
+
+        exclude = set(int(x) for x in (exclude if exclude is not None else []))
+        if sink is not None:
+            exclude.update(int(x) for x in sink.keys(MAP_TABLE_NAMES[0], "mapid"))
+
+        # MapsFact has a row per team, each map is requested once
+        return [x for x in dict.fromkeys(int(x) for x in map_ids) if x not in exclude]
+
+    def _add_map_stats(self, rows: "MapStatsRows", chunk: list, stats: dict) -> None:
+        for map_id in chunk:
+            if map_id not in stats:
+                print("Map stats could not be extracted: ", map_id)
+                self.failed_maps.append(map_id)
+                continue
+            try:
+                rows.add(stats[map_id])
+            except Exception as e:
+                print("A parse exception was raised on map: ", map_id)
+                print(e)
+                self.failed_maps.append(map_id)
+
+    def _flush_map_chunk(self, rows: "MapStatsRows", sink: Sink) -> list[pd.DataFrame]:
+        """
+        Writes a map stats chunk to the sink, if it can't be built or written its maps are added to self.failed_maps
+        and the queue goes on with the next chunk
+        """
+        try:
+            return rows.flush(sink)
+        except Exception as e:
+            print("*" * 10)
+            print("A chunk could not be written: ", rows.maps, " maps")
+            print(e)
+            print("*" * 10)
+            self.failed_maps.extend(rows.clear())
+
+            return rows.frames()
+
+
+class MatchRows:
+    """
+    Batched normalization engine shared by the sync and async match queues. Raw fields of every added match are stored
+    column by column and converted once per column when the DataFrames are built (datetimes, ints, booleans and K-D
+    strings), so normalizing many matches is not dominated by per-row pandas and parsing work. Dimension rows are kept
+    in dicts to eval if an element is already stored faster, and their keys are remembered after a flush so team, event
+    and player rows are not written twice to a sink. If a FrameValidator is given, built frames only keep the rows that
+    pass the schema checks, which run before the columns are converted
+    """
+
+    # Player stats are stored with raw K-D strings, they are split into kills and deaths columns when building frames
+    raw_player_cols = ["mapId", "teamid", "matchId", "playerid", "map", "ct_kd", "ct_adr", "t_kd", "t_adr"]
+
+    def __init__(self, api: HltvApi, validator=None):
+        self.api = api
+        self.validator = validator
+        self.player_dim_rows = {}
+        self.team_rows = {}
+        self.event_rows = {}
+        self.match_columns = {col: [] for col in api.match_cols}
+        self.map_columns = {col: [] for col in api.map_cols}
+        self.player_columns = {col: [] for col in self.raw_player_cols}
+
+        # Dimension keys already written to a sink
+        self.flushed_teams = set()
+        self.flushed_events = set()
+        self.flushed_players = set()
+
+        # Approximate size in bytes of the stored values and matches added since the last flush
+        self.size = 0
+        self.matches = 0
+        # Match tuples added since the last flush, so a chunk that can't be written can be requested again
+        self.sources = []
+
+    def _append(self, columns: dict, rows: list[tuple]) -> None:
+        for row in rows:
+            for column, value in zip(columns.values(), row):
+                column.append(value)
+            # Each value takes its own size plus a list slot
+            self.size += sum(sys.getsizeof(x) for x in row) + 8 * len(row)
+
+    def add(self, match: dict, source: tuple = None) -> None:
+        """
+        Collects the raw fields of a match dictionary returned by request_match_info. Fields are only stored once the
+        whole match was read, so a match that raises leaves no partial rows behind
+        :param match: match dictionary returned by request_match_info
+        :type match: dict
+        :param source: tuple with (match id number, match link) the match was requested with
+        :type source: tuple
+        """
+        info = match["match_info"]
+        team1, team2 = match["team1"], match["team2"]
+        match_row = (info["match_id"], info["bestof"], info["instance"], info["event_id"], info["lan"], info["date"],
+                     team1["id"], team2["id"], (team1["id"] if team1["won"] is True else team2["id"]))
+
+        # Map results can be empty if match was forfeit and no map was played, each map has a row per team
+        map_rows = []
+        for key, dct in match["map_results"].items():
+            if dct is None or key == "Default":
+                continue
+            first, second = dct["first_team"], dct["second_team"]
+            map_rows.append((dct["mapID"], info["match_id"], team1["id"], key, first["score"], second["score"],
+                             first["round_results"][0][1], first["round_results"][1][1], dct["overtime"],
+                             first["won"], first["pick"]))
+            map_rows.append((dct["mapID"], info["match_id"], team2["id"], key, second["score"], first["score"],
+                             second["round_results"][0][1], second["round_results"][1][1], dct["overtime"],
+                             second["won"], second["pick"]))
+
+        # Player stats can also be null if match was forfeit, global stats hold the player dimension data
+        player_rows = []
+        player_dims = {}
+        if match["player_stats"] is not None:
+            for key, dct in match["player_stats"].items():
+                if key == "global_stats":
+                    for team in dct.values():
+                        for nick, player in team.items():
+                            player_dims[player["playerID"]] = [player["playerName"], nick, player["nationality"]]
+                    continue
+                map_id = match["map_results"][key]["mapID"]
+                for side, team_id in (("first_team", team1["id"]), ("second_team", team2["id"])):
+                    for stats in dct[side].values():
+                        player_rows.append((map_id, team_id, info["match_id"], stats["playerID"], key,
+                                            stats["ct"]["kd"], stats["ct"]["adr"], stats["t"]["kd"],
+                                            stats["t"]["adr"]))
+
+        # Process team, event and player data into dimension containers
+        self.team_rows.setdefault(team1["id"], team1["name"])
+        self.team_rows.setdefault(team2["id"], team2["name"])
+        self.event_rows.setdefault(match["event"]["id"], match["event"]["name"])
+        for key, value in player_dims.items():
+            self.player_dim_rows.setdefault(key, value)
+
+        self._append(self.match_columns, [match_row])
+        self._append(self.map_columns, map_rows)
+        self._append(self.player_columns, player_rows)
+        self.matches += 1
+        # HLTV redirects to the right slug when only the id is known
+        self.sources.append(source if source is not None
+                            else (info["match_id"], "/matches/{}/-".format(info["match_id"])))
+
+    def is_full(self, chunk_size: int, max_memory_mb: float = None) -> bool:
+        """
+        Checks if enough matches or memory were accumulated to flush a chunk
+        """
+        return self.matches >= chunk_size or (max_memory_mb is not None and self.size >= max_memory_mb * 1024 ** 2)
+
+    @staticmethod
+    def _cast(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+        """
+        Converts every typed column at once, values that can't be converted are left missing and no error is raised
+        """
+        return df.assign(**{col: pd.to_numeric(df[col], errors="coerce") for col in dtypes}).astype(dtypes)
+
+    def frames(self, commit: bool = True) -> list[pd.DataFrame]:
+        """
+        Builds the team, event, player, match, map and player stats DataFrames converting each column once, leaving out
+        flushed dimension rows
+        :param commit: if False, keys accepted by the validator are left pending until the chunk is written
+        :type commit: bool
+        :return: list of DataFrames ordered as sinks.TABLE_NAMES
+        :rtype: list of DataFrames
+        """
+        teams = {k: v for k, v in self.team_rows.items() if k not in self.flushed_teams}
+        events = {k: v for k, v in self.event_rows.items() if k not in self.flushed_events}
+        players = {k: v for k, v in self.player_dim_rows.items() if k not in self.flushed_players}
+
+        # K-D strings are split for the whole column at once, values like "-" are left missing
+        player_df = pd.DataFrame(self.player_columns)
+        for side in ("ct", "t"):
+            kd = player_df[side + "_kd"].astype(str).str.extract(r"^(\d+)-(\d+)$")
+            player_df[side + "_kills"] = kd[0]
+            player_df[side + "_deaths"] = kd[1]
+
+        frames = [
+            pd.DataFrame.from_dict(teams, orient="index", columns=['teamName']),
+            pd.DataFrame.from_dict(events, orient="index", columns=['eventName']),
+            pd.DataFrame.from_dict(players, orient="index", columns=['playerName', 'playerNick', 'nationality']),
+            pd.DataFrame(self.match_columns),
+            pd.DataFrame(self.map_columns),
+            player_df[self.api.player_cols]
         ]
+
+        # Rows are validated with the scraped values, before a malformed one is converted to a missing value
+        if self.validator is not None:
+            frames = self.validator.validate(frames, commit)
+
+        # Scores are scraped as text, numeric conversion is done for the whole column
+        frames[3] = self._cast(frames[3], self.api.match_dtypes)
+        frames[3]["date"] = pd.to_datetime(frames[3]["date"], errors="coerce")
+        frames[4] = self._cast(frames[4], self.api.map_dtypes)
+        frames[5] = self._cast(frames[5], self.api.player_dtypes)
+
+        return frames
+
+    def flush(self, sink: Sink) -> list[pd.DataFrame]:
+        """
+        Writes the stored rows to a sink and clears every container
+        :param sink: destination for the chunk
+        :type sink: Sink
+        :return: list of DataFrames written to the sink
+        :rtype: list of DataFrames
+        """
+        # Validated keys are only remembered once the chunk is written, a failed chunk can be validated again
+        frames = self.frames(commit=False)
+        sink.write(frames)
+        if self.validator is not None:
+            self.validator.commit()
+        print("FLUSHED CHUNK: ", self.matches, " matches")
+
+        # Remember flushed dimension keys and clear all containers
+        self.flushed_teams.update(self.team_rows)
+        self.flushed_events.update(self.event_rows)
+        self.flushed_players.update(self.player_dim_rows)
+        self.clear()
+
+        return frames
+
+    def clear(self) -> list[tuple]:
+        """
+        Drops the stored rows without writing them, dimension keys are not remembered as flushed
+        :return: list of tuples (matchid, matchlink) of the dropped matches
+        :rtype: list[tuple]
+        """
+        sources = self.sources
+        for container in (self.team_rows, self.event_rows, self.player_dim_rows, *self.match_columns.values(),
+                          *self.map_columns.values(), *self.player_columns.values()):
+            container.clear()
+        self.size = 0
+        self.matches = 0
+        self.sources = []
+
+        return sources
+
+
+class MapStatsRows:
+    """
+    Columnar container for the dictionaries returned by Parser.parse_map_stats, same approach as MatchRows. Values are
+    stored column by column and every column is cast once to a compact dtype when the DataFrames are built
+    """
+
+    def __init__(self, api: HltvApi):
+        self.api = api
+        self.team_columns = {col: [] for col in api.map_team_cols}
+        self.round_columns = {col: [] for col in api.round_cols}
+        self.player_columns = {col: [] for col in api.map_player_cols}
+        self.maps = 0
+        # Map ids added since the last flush
+        self.ids = []
+
+    def add(self, stats: dict) -> None:
+        """
+        Collects the rows of a parsed map stats page, nothing is stored if the page is incomplete
+        :param stats: dict returned by Scraper.request_map_stats
+        :type stats: dict
+        """
+        map_id = stats["id"]
+        team_ids = {1: stats["team1"]["id"], 2: stats["team2"]["id"]}
+        if None in team_ids.values():
+            raise ValueError("Teams not found in map stats page {}".format(map_id))
+
+        team_rows = [(map_id, stats[key]["id"], stats[key]["first_kills"], stats[key]["clutches"],
+                      stats[key]["rating"]) for key in ("team1", "team2")]
+        round_rows = [(map_id, position, team_ids[team], outcome) for position, team, outcome in stats["rounds"]]
+        player_rows = [(map_id, team_ids[player[0]], *player[1:]) for player in stats["players"]]
+
+        for columns, new_rows in ((self.team_columns, team_rows), (self.round_columns, round_rows),
+                                  (self.player_columns, player_rows)):
+            for row in new_rows:
+                for column, value in zip(columns.values(), row):
+                    column.append(value)
+        self.maps += 1
+        self.ids.append(map_id)
+
+    def frames(self) -> list[pd.DataFrame]:
+        """
+        Builds the map team, round and map player DataFrames
+        :return: list of DataFrames ordered as sinks.MAP_TABLE_NAMES
+        :rtype: list of DataFrames
+        """
+        frames = []
+        for columns, dtypes in ((self.team_columns, self.api.map_team_dtypes),
+                                (self.round_columns, self.api.round_dtypes),
+                                (self.player_columns, self.api.map_player_dtypes)):
+            df = pd.DataFrame(columns)
+            # Missing stats are stored as None, numeric conversion turns them and malformed values into NaN
+            for col, dtype in dtypes.items():
+                if dtype != "category":
+                    df[col] = pd.to_numeric(df[col], errors="coerce")
+            frames.append(df.astype(dtypes))
+
+        return frames
+
+    def flush(self, sink: Sink) -> list[pd.DataFrame]:
+        """
+        Writes the stored rows to a sink and clears every container
+        :param sink: destination for the chunk
+        :type sink: Sink
+        :return: list of DataFrames written to the sink
+        :rtype: list of DataFrames
+        """
+        frames = self.frames()
+        sink.write(frames, MAP_TABLE_NAMES)
+        print("FLUSHED CHUNK: ", self.maps, " maps")
+        self.clear()
+
+        return frames
+
+    def clear(self) -> list[int]:
+        """
+        Drops the stored rows without writing them
+        :return: list with the ids of the dropped maps
+        :rtype: list[int]
+        """
+        ids = self.ids
+        for container in (*self.team_columns.values(), *self.round_columns.values(), *self.player_columns.values()):
+            container.clear()
+        self.maps = 0
+        self.ids = []
+
+        return ids
+
+
+def __getattr__(name: str):
+    # AsyncHltvApi lives in its own module so sync users never import aiohttp, it is still reachable from here
+    if name == "AsyncHltvApi":
+        from asyncHltvApi import AsyncHltvApi
+        return AsyncHltvApi
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,134 @@
+from typing import Iterable
+
+import heapq
+import itertools
+import threading
+import time
+
+# Priority classes, lower values are more latency sensitive
+FRESH = 0
+WATCHED = 1
+BACKFILL = 2
+
+
+class MatchScheduler:
+    """
+    Priority and deadline aware replacement for the deque passed to HltvApi.start_matches_queue. Matches are added to
+    a priority class (FRESH results, WATCHED teams, historical BACKFILL) and the request budget of the queue is shared
+    between classes by weight, so a multi-day backfill keeps progressing while fresh matches are served within minutes.
+    Matches whose deadline is closer than the urgency window are served first, earliest deadline first.
+
+    It exposes the same len() and pop() interface as a deque and can be pickled with the pending matches, matches can
+    also be added from other threads while the queue is running.
+
+        schedule = MatchScheduler()
+        schedule.extend(bot.get_last_matches(), FRESH, deadline=600)
+        schedule.extend(old_matches, BACKFILL)
+        bot.start_matches_queue(schedule, sink=sink)
+    """
+
+    def __init__(self, weights: dict = None, urgency: float = 60):
+        """
+        :param weights: share of the request budget of each class, defaults to {FRESH: 6, WATCHED: 3, BACKFILL: 1}
+        :type weights: dict
+        :param urgency: seconds before its deadline when a match is served ahead of the class shares
+        :type urgency: float
+        """
+        self.weights = (weights if weights is not None else {FRESH: 6, WATCHED: 3, BACKFILL: 1})
+        self.urgency = urgency
+
+        # One heap per class ordered by (deadline, insertion order), entries are [deadline, seq, match, valid, class]
+        self.heaps = {cls: [] for cls in self.weights}
+        # Latest entry of every queued match id, replaced entries are flagged as not valid and skipped when popped
+        self.entries = {}
+        # Stride scheduling: each pop advances the pass of the served class by 1 / weight
+        self.passes = {cls: 0.0 for cls in self.weights}
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["lock"]
+        # itertools.count can't be pickled, it is rebuilt from the next value
+        state["counter"] = next(self.counter)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state["counter"] = itertools.count(state["counter"])
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, match: tuple, priority: int = BACKFILL, deadline: float = None) -> None:
+        """
+        Adds a match to a priority class. If the match is already queued, it keeps the most urgent priority and
+        deadline of both
+        :param match: tuple with (match id number, match link)
+        :type match: tuple
+        :param priority: FRESH, WATCHED or BACKFILL
+        :type priority: int
+        :param deadline: seconds from now when the match should be processed, None if it has no deadline
+        :type deadline: float
+        """
+        if priority not in self.heaps:
+            raise ValueError("Unknown priority class {}".format(priority))
+        due = (time.time() + deadline if deadline is not None else float("inf"))
+
+        with self.lock:
+            queued = self.entries.get(match[0])
+            if queued is not None:
+                if queued[4] <= priority and queued[0] <= due:
+                    return
+                queued[3] = False
+                priority = min(priority, queued[4])
+                due = min(due, queued[0])
+
+            # A class that was idle starts from the lowest active pass, so idle time is not saved up as credit
+            if not self.heaps[priority]:
+                active = [self.passes[cls] for cls, heap in self.heaps.items() if heap]
+                self.passes[priority] = max(self.passes[priority], min(active, default=0.0))
+
+            entry = [due, next(self.counter), match, True, priority]
+            self.entries[match[0]] = entry
+            heapq.heappush(self.heaps[priority], entry)
+
+    def extend(self, matches: Iterable[tuple], priority: int = BACKFILL, deadline: float = None) -> None:
+        """
+        Adds many matches to the same priority class with the same deadline
+        """
+        for match in matches:
+            self.add(match, priority, deadline)
+
+    def _top(self, cls: int):
+        heap = self.heaps[cls]
+        # Drop entries replaced by a more urgent one
+        while heap and not heap[0][3]:
+            heapq.heappop(heap)
+        return (heap[0] if heap else None)
+
+    def pop(self) -> tuple:
+        """
+        Returns the next match to process
+        :return: tuple with (match id number, match link)
+        :rtype: tuple
+        """
+        with self.lock:
+            tops = {cls: self._top(cls) for cls in self.heaps}
+            tops = {cls: entry for cls, entry in tops.items() if entry is not None}
+            if not tops:
+                raise IndexError("pop from an empty MatchScheduler")
+
+            # Deadlines about to expire go first, then the class with the lowest pass
+            urgent = [cls for cls, entry in tops.items() if entry[0] <= time.time() + self.urgency]
+            if urgent:
+                cls = min(urgent, key=lambda x: tops[x][0])
+            else:
+                cls = min(tops, key=lambda x: (self.passes[x], x))
+
+            entry = heapq.heappop(self.heaps[cls])
+            self.passes[cls] += 1 / self.weights[cls]
+            del self.entries[entry[2][0]]
+
+            return entry[2]
@@ -0,0 +1,303 @@
+from typing import AsyncIterator, Union
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date
+from .cache import EntityCache
+from .ratelimit import RateLimiter
+from .scraper import Scraper
+
+import asyncio
+
+# aiohttp is only needed by the async client, the sync Scraper works without it
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncScraper(Scraper):
+    """
+    Asyncio version of Scraper, every request method is overridden by an awaitable one. Requests share one aiohttp
+    session and parsing is delegated to the same Scraper/Parser functions, offloaded to an executor so the event loop
+    is never blocked by BeautifulSoup. Must be used as an async context manager:
+
+        async with AsyncScraper() as bot:
+            matches = await bot.get_matches_teamid(9996)
+    """
+
+    def __init__(self, concurrency: int = 8, executor: Executor = None, limiter: RateLimiter = None):
+        """
+        :param concurrency: max number of requests in flight at the same time
+        :type concurrency: int
+        :param executor: executor used to parse pages, defaults to a process pool
+        :type executor: Executor
+        :param limiter: rate limit applied to every request, defaults to the one shared by all scrapers in the process
+        :type limiter: RateLimiter
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncScraper requires aiohttp, install it with 'pip install aiohttp'")
+
+        super().__init__()
+        if limiter is not None:
+            self.limiter = limiter
+        self.concurrency = concurrency
+        self.executor = executor
+        self.session = None
+        self._own_executor = executor is None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.session.close()
+        if self._own_executor:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def _request(self, link: str) -> bytes:
+        """
+        Makes a GET request limited by the concurrency semaphore and the rate limiter, returns the raw response body
+        """
+        async with self._semaphore:
+            await self.limiter.acquire_async()
+            try:
+                async with self.session.get(link) as html:
+                    html.raise_for_status()
+                    return await html.read()
+
+            except aiohttp.ClientResponseError as e:
+                print("An exception was raised:", e)
+                raise e
+
+    async def _parse(self, function, *args):
+        """
+        Runs a parsing function in the executor
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def get_teamids(self) -> list[str]:
+        """
+        Obtains the top 30 current team ids from HLTV
+        :return: list with top 30 team ids
+        :rtype: list
+        """
+        content = await self._request(self.ranks)
+        return await self._parse(Scraper.parse_teamids, content.decode(errors="replace"))
+
+    async def _get_results(self, link: str, limit: Union[int, None], summary: bool, fast: bool) -> list:
+        """
+        Requests the first results page of a listing and then every needed offset page concurrently
+        """
+        matches, matches_number = await self._parse(Scraper.parse_results_page, await self._request(link), summary,
+                                                    fast)
+
+        # Offset pages are only requested up to the limit, or all of them if there is no limit
+        last = (matches_number or 0) if not limit else min(limit, matches_number or 0)
+        separator = ("" if link.endswith(("?", "&")) else "&")
+        offset_links = [link + separator + "offset=" + str(offset) for offset in range(100, last, 100)]
+        pages = await asyncio.gather(*[self._request(x) for x in offset_links])
+        for page in await asyncio.gather(*[self._parse(Scraper.parse_results_page, x, summary, fast)
+                                           for x in pages]):
+            matches.extend(page[0])
+
+        return (matches[:limit] if limit else matches)
+
+    async def get_last_matches(self, limit: int = 100, summary: bool = False,
+                               fast: bool = False) -> list[Union[tuple, dict]]:
+        """
+        Returns all the last limit specified matches posted on hltv
+        :param limit: limits the number of retrieved matches, defaults to 100 to prevent extracting all hltv records
+        :type limit: int
+        :param summary: if True, return the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: list of tuples with format (matchID, matchlink) or list of dicts returned by Parser.parse_match_summary
+        :rtype: List[tuple(int, str)], List[dict]
+        """
+        return await self._get_results(self.matches, limit, summary, fast)
+
+    async def get_matches_teamid(self, teamid: Union[str, int], limit: int = 100, summary: bool = False,
+                                 fast: bool = False) -> list[Union[tuple, dict]]:
+        """
+        Obtains all the matches for a specified team
+        :param teamid: str with team id numbers
+        :type teamid: str
+        :param limit: specifies how many matches to return
+        :type limit: int
+        :param summary: if True, return the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: list with all the links to historical matches results or list of match summary dicts
+        :rtype: List[tuple(id, link)], List[dict]
+        """
+        if not isinstance(teamid, (str, int)):
+            raise TypeError("Invalid teamid type for get_matches_teamid, only str or int are allowed")
+
+        return await self._get_results(self.results + str(teamid), limit, summary, fast)
+
+    async def get_matches_eventid(self, eventids: Union[str, int, list], summary: bool = False,
+                                  fast: bool = False) -> list[Union[tuple, dict]]:
+        """
+        Crawls only the results pages of the specified events and returns their matches
+        :param eventids: event id or list of event ids
+        :type eventids: str, int, list
+        :param summary: if True, return the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: list of tuples with format (matchID, matchlink) ready for start_matches_queue
+        :rtype: List[tuple(int, str)], List[dict]
+        """
+        return await self.get_matches_daterange(eventids=eventids, summary=summary, fast=fast)
+
+    async def get_matches_daterange(self, start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+                                    eventids: Union[str, int, list] = None, summary: bool = False,
+                                    fast: bool = False) -> list[Union[tuple, dict]]:
+        """
+        Crawls only the results pages between two dates, optionally scoped to some events, and returns their matches
+        :param start_date: first day to include, str in format YYYY-MM-DD or date object
+        :type start_date: str, date
+        :param end_date: last day to include, str in format YYYY-MM-DD or date object
+        :type end_date: str, date
+        :param eventids: event id or list of event ids to filter results, defaults to all events
+        :type eventids: str, int, list
+        :param summary: if True, return the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: list of tuples with format (matchID, matchlink) ready for start_matches_queue
+        :rtype: List[tuple(int, str)], List[dict]
+        """
+        listings = await asyncio.gather(*[self._get_results(link, None, summary, fast)
+                                          for link in self._results_links(start_date, end_date, eventids)])
+        return [match for listing in listings for match in listing]
+
+    async def request_match_info(self, match_id: tuple) -> dict:
+        """
+        Extracts all relevant match information and puts it into a dictionary for further use
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :return: dictionary with match information
+        :rtype: dict
+        """
+        content = await self.request_match_page(match_id)
+        return await self._parse(Scraper.parse_match_page, content.decode(errors="replace"), match_id)
+
+    async def request_match_page(self, match_id: tuple) -> bytes:
+        """
+        Requests a match page without parsing it, exceptions raised here are always network errors
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :return: raw bytes of the match page
+        :rtype: bytes
+        """
+        return await self._request(self.base + match_id[1])
+
+    async def get_event_info(self, eventid: Union[str, int]) -> dict:
+        """
+        Obtains the event details (dates, location, prize pool, tier) from its event page
+        :param eventid: event id
+        :type eventid: str, int
+        :return: dict returned by Parser.parse_event_info with the event id
+        :rtype: dict
+        """
+        return await self._request_entity("event", eventid)
+
+    async def get_team_info(self, teamid: Union[str, int]) -> dict:
+        """
+        Obtains the team details (name, country, ranking, lineup) from its profile page
+        :param teamid: team id
+        :type teamid: str, int
+        :return: dict returned by Parser.parse_team_profile with the team id
+        :rtype: dict
+        """
+        return await self._request_entity("team", teamid)
+
+    async def get_player_info(self, playerid: Union[str, int]) -> dict:
+        """
+        Obtains the player details (name, country, age, current team) from its profile page
+        :param playerid: player id
+        :type playerid: str, int
+        :return: dict returned by Parser.parse_player_profile with the player id
+        :rtype: dict
+        """
+        return await self._request_entity("player", playerid)
+
+    async def request_map_stats(self, mapid: Union[str, int]) -> dict:
+        """
+        Obtains the detailed stats of a played map (round history, first kills, clutches, rating) from its mapstatsid
+        page, the id is the mapID of the map results returned by request_match_info
+        :param mapid: map stats id
+        :type mapid: str, int
+        :return: dict returned by Parser.parse_map_stats with the map id
+        :rtype: dict
+        """
+        return await self._request_entity("mapstats", mapid)
+
+    async def _request_entity(self, kind: str, entity_id: Union[str, int]) -> dict:
+        content = await self._request(self.entities[kind].format(entity_id))
+        return await self._parse(Scraper.parse_entity_page, kind, content.decode(errors="replace"), entity_id)
+
+    async def get_entities(self, kind: str, ids: list, cache: EntityCache = None, max_workers: int = None) -> dict:
+        """
+        Obtains the details of many events, teams, players or map stats. Duplicated ids are requested once, ids with a
+        fresh cache entry are not requested at all and the rest are requested concurrently and stored in the cache
+        :param kind: "event", "team", "player" or "mapstats"
+        :type kind: str
+        :param ids: entity ids, usually the index of a dimension DataFrame
+        :type ids: list
+        :param cache: persistent cache shared between runs, without one every id is requested
+        :type cache: EntityCache
+        :param max_workers: kept for compatibility with Scraper.get_entities, requests in flight are limited by
+                            self.concurrency
+        :type max_workers: int
+        :return: dict with id as key and the parsed entity dict as value, ids that failed are left out
+        :rtype: dict
+        """
+        if kind not in self.entities:
+            raise ValueError("Invalid entity kind, only event, team, player or mapstats are allowed")
+
+        # Coalesce duplicated ids of the batch before looking at the cache
+        ids = list(dict.fromkeys(int(x) for x in ids))
+        found = (cache.get_many(kind, ids) if cache is not None else {})
+        missing = [x for x in ids if x not in found]
+
+        async def request(entity_id: int) -> Union[dict, None]:
+            try:
+                return await self._request_entity(kind, entity_id)
+            except Exception as e:
+                print("An exception was raised on {} {}:".format(kind, entity_id), e)
+                return None
+
+        for entity_id, info in zip(missing, await asyncio.gather(*[request(x) for x in missing])):
+            if info is None:
+                continue
+            found[entity_id] = info
+            if cache is not None:
+                cache.set(kind, entity_id, info)
+
+        return found
+
+    async def iter_matches(self, matches: list[tuple]) -> AsyncIterator[tuple]:
+        """
+        Requests every match concurrently and yields them as they finish, failed matches are yielded with the raised
+        exception instead of the dictionary so the caller decides how to handle them
+        :param matches: list of tuples with format (matchID, matchlink)
+        :type matches: list[tuple]
+        :return: async iterator of tuples with format ((matchID, matchlink), dict or Exception)
+        :rtype: AsyncIterator[tuple]
+        """
+        async def request(match_id: tuple) -> tuple:
+            try:
+                return match_id, await self.request_match_info(match_id)
+            except Exception as e:
+                return match_id, e
+
+        for task in asyncio.as_completed([request(x) for x in matches]):
+            yield await task
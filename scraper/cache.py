@@ -0,0 +1,65 @@
+from typing import Union
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class EntityCache:
+    """
+    Persistent cache of parsed entity pages (events, teams, players) stored in a SQLite file. Entries older than the
+    time to live are treated as missing, so every entity is requested at most once per ttl
+    """
+
+    def __init__(self, path: str = "hltv_cache.db", ttl: float = 7 * 24 * 3600):
+        """
+        :param path: SQLite file path, ":memory:" keeps the cache only for this process
+        :type path: str
+        :param ttl: seconds an entry is valid, defaults to a week
+        :type ttl: float
+        """
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS entities (kind TEXT NOT NULL, id INTEGER NOT NULL, "
+                                    "fetched REAL NOT NULL, data TEXT NOT NULL, PRIMARY KEY (kind, id))")
+
+    def get_many(self, kind: str, ids: list[int]) -> dict:
+        """
+        Returns the fresh cached entries of the requested ids, missing or expired ids are left out
+        :param kind: entity kind ("event", "team" or "player")
+        :type kind: str
+        :param ids: entity ids
+        :type ids: list[int]
+        :return: dict with id as key and the parsed entity dict as value
+        :rtype: dict
+        """
+        found = {}
+        ids = list(ids)
+        # SQLite limits the number of parameters, ids are looked up in slices
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT id, data FROM entities WHERE kind = ? AND fetched >= ? AND id IN ({})".format(
+                        ",".join("?" * len(part))), [kind, time.time() - self.ttl, *part]).fetchall()
+            for entity_id, data in rows:
+                found[entity_id] = json.loads(data)
+
+        return found
+
+    def get(self, kind: str, entity_id: int) -> Union[dict, None]:
+        return self.get_many(kind, [entity_id]).get(entity_id)
+
+    def set(self, kind: str, entity_id: int, data: dict) -> None:
+        """
+        Stores a parsed entity, replacing the previous entry
+        """
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?)",
+                                    (kind, entity_id, time.time(), json.dumps(data)))
+
+    def close(self) -> None:
+        self.connection.close()
@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Tuple, Union
 from bs4 import Tag
 from bs4.element import ResultSet
+from datetime import datetime, timezone
 
 import re
 
@@ -23,6 +24,41 @@ def extract_ids(text: str) -> List[str]:
     return ids
 
 
+# Precompiled patterns used by fast_parse_match_links over the raw bytes of a results listing page. result-con has to
+# be a whole class of the div, as in the tree parser, so classes like result-con-featured are not taken as rows
+RESULT_CON = rb'<div[^>]*\bclass="(?:[^"]*\s)?result-con(?=[\s"])'
+RESULT_CON_RE = re.compile(RESULT_CON)
+MATCH_LINK_RE = re.compile(RESULT_CON + rb'[^>]*>\s*<a[^>]*?\bhref="(/matches/(\d+)/[^"]*)"')
+# Totals the tree parser can't convert (like 61,234) don't match, so the caller falls back to it
+PAGINATION_RE = re.compile(rb'<span[^>]*\bclass="pagination-data"[^>]*>[^<]*?\bof\s+(\d+)\s*</span>')
+
+
+def fast_parse_match_links(content: bytes) -> Union[Tuple[List[tuple], Union[int, None]], None]:
+    """
+    Extracts (id, link) tuples and the pagination total from the raw bytes of a results listing page without building
+    a BeautifulSoup tree. Returns the same values as the tree parser or None when the page doesn't look as expected,
+    in which case the caller should fall back to Parser.parse_match_links
+    :param content: raw bytes of a results listing page
+    :type content: bytes
+    :return: tuple with (list of (matchID, matchlink) tuples, total matches or None if there is no pagination)
+    :rtype: tuple, None
+    """
+    matches = [(int(match_id), link.decode()) for link, match_id in MATCH_LINK_RE.findall(content)]
+
+    # Every result-con div must have produced a link, otherwise the layout changed and regexes can't be trusted
+    if len(matches) != len(RESULT_CON_RE.findall(content)):
+        return None
+
+    pagination = PAGINATION_RE.search(content)
+    if pagination is None:
+        # Pages with matches always show the pagination span, and a span that didn't match is left to the tree parser
+        if matches or b'class="pagination-data"' in content:
+            return None
+        return matches, None
+
+    return matches, int(pagination.group(1))
+
+
 class Parser:
     def parse_match_links(self: Tag) -> tuple:
         # Link info is contained inside the <a> tag of the div tag
@@ -31,6 +67,52 @@ class Parser:
         match = (ids, links)
         return match
 
+    def parse_match_summary(self: Tag) -> dict:
+        """
+        Receives a result-con div from a results listing page and extracts the series level information shown in the
+        row, so win/loss data can be gathered without requesting each match page
+        :return: dict with keys ["match_id", "link", "date", "team1", "team2", "t1_score", "t2_score", "winner",
+                 "event_name", "format"]
+        :rtype: dict
+        """
+        match_id, link = Parser.parse_match_links(self)
+
+        # Team names are inside team divs, the winner has the extra class team-won
+        teams = self.find_all("div", class_="team")
+        team1 = teams[0].text.strip()
+        team2 = teams[1].text.strip()
+
+        # Series score is split in two spans (score-won, score-lost or score-tie) inside the result-score cell
+        scores = self.find("td", class_="result-score").find_all("span")
+        t1_score = int(scores[0].text)
+        t2_score = int(scores[1].text)
+
+        if "team-won" in teams[0]["class"]:
+            winner = team1
+        elif "team-won" in teams[1]["class"]:
+            winner = team2
+        else:
+            winner = None
+
+        # Row timestamp is stored in milliseconds, it can be missing on some older listing layouts
+        unix = self.get("data-zonedgrouping-entry-unix")
+        date = (str(datetime.fromtimestamp(int(unix) / 1000, tz=timezone.utc)) if unix else None)
+
+        # Event name is the span text, the map-text div contains "bo?" for series, map name for bo1 or "def" if forfeit
+        event = self.find("span", class_="event-name")
+        map_text = self.find("div", class_="map-text")
+
+        return {"match_id": match_id,
+                "link": link,
+                "date": date,
+                "team1": team1,
+                "team2": team2,
+                "t1_score": t1_score,
+                "t2_score": t2_score,
+                "winner": winner,
+                "event_name": (event.text.strip() if event else None),
+                "format": (map_text.text.strip() if map_text else None)}
+
     def parse_team_info(self: Tag) -> dict:
         team_link = self.a['href']
         team_id = extract_ids(team_link)
@@ -196,6 +278,11 @@ class Parser:
         Receives a div class stats-content with child tables containing player stats information. First div is the
         global player stats for all maps and has id = 'all-content', next ones are map specific with id = ('id'-content)
         """
+        def adr(row: Tag) -> Union[float, None]:
+            # ADR is shown as "-" when HLTV has no damage data for the map
+            text = row.find("td", class_="adr").text.strip()
+            return (None if text == "-" else float(text))
+
         # First three tables are global, ct and t data from first_team, next three are for the second team
         tables = self.find_all("table")
 
@@ -210,7 +297,7 @@ class Parser:
             team1_dict[nick] = {
                 "playerID": int(extract_ids(x.find("a", class_="flagAlign")["href"])[0]),
                 "global": {"kd": x.find("td", class_="kd").text,
-                           "adr": float(x.find("td", class_="adr").text)}
+                           "adr": adr(x)}
             }
             # Append player props only to global (all-maps) stats to avoid redundancy (global stats has id all-content)
             if self["id"] == "all-content":
@@ -222,14 +309,14 @@ class Parser:
         for x in tables[1].find_all("tr", class_=""):
             team1_dict[x.find("span", class_="player-nick").text]["ct"] = {
                 "kd": x.find("td", class_="kd").text,
-                "adr": float(x.find("td", class_="adr").text)
+                "adr": adr(x)
             }
 
         # Terrorist first team stats
         for x in tables[2].find_all("tr", class_=""):
             team1_dict[x.find("span", class_="player-nick").text]["t"] = {
                 "kd": x.find("td", class_="kd").text,
-                "adr": float(x.find("td", class_="adr").text)
+                "adr": adr(x)
             }
 
         # Find second team player info
@@ -239,7 +326,7 @@ class Parser:
             team2_dict[nick] = {
                 "playerID": int(extract_ids(x.find("a", class_="flagAlign")["href"])[0]),
                 "global": {"kd": x.find("td", class_="kd").text,
-                           "adr": float(x.find("td", class_="adr").text)}
+                           "adr": adr(x)}
             }
             # Append player props only to global (all-maps) stats to avoid redundancy (global stats has id all-content)
             if self["id"] == "all-content":
@@ -251,14 +338,184 @@ class Parser:
         for x in tables[4].find_all("tr", class_=""):
             team2_dict[x.find("span", class_="player-nick").text]["ct"] = {
                 "kd": x.find("td", class_="kd").text,
-                "adr": float(x.find("td", class_="adr").text)
+                "adr": adr(x)
             }
 
         # Terrorist second team stats
         for x in tables[5].find_all("tr", class_=""):
             team2_dict[x.find("span", class_="player-nick").text]["t"] = {
                 "kd": x.find("td", class_="kd").text,
-                "adr": float(x.find("td", class_="adr").text)
+                "adr": adr(x)
             }
 
         return team1_dict, team2_dict
+
+    def parse_event_info(self: Tag) -> dict:
+        """
+        Receives the parsed html of an event page and extracts the event details. Fields missing from the page layout
+        are returned as None
+        :return: dict with keys ["name", "start_date", "end_date", "location", "prize_pool", "teams", "tier"]
+        :rtype: dict
+        """
+        def text(tag: Tag) -> Union[str, None]:
+            return (tag.text.strip() if tag is not None else None)
+
+        # Start and end dates are spans with the unix time in milliseconds
+        dates = []
+        date_cell = self.find("td", class_="eventdate")
+        if date_cell is not None:
+            for span in date_cell.find_all("span", attrs={"data-unix": True}):
+                dates.append(str(datetime.fromtimestamp(int(span["data-unix"]) / 1000, tz=timezone.utc).date()))
+
+        # Tier is shown as the event type (Major, Intl. LAN, Online...) in the event hub header
+        tier = self.find(class_="event-type") or self.find("td", class_="eventtype")
+
+        return {"name": text(self.find("h1", class_="event-hub-title")),
+                "start_date": (dates[0] if dates else None),
+                "end_date": (dates[-1] if dates else None),
+                "location": text(self.find("td", class_="location")),
+                "prize_pool": text(self.find("td", class_="prizepool")),
+                "teams": text(self.find("td", class_="teamsNumber")),
+                "tier": text(tier)}
+
+    def parse_team_profile(self: Tag) -> dict:
+        """
+        Receives the parsed html of a team profile page and extracts the team details. Fields missing from the page
+        layout are returned as None
+        :return: dict with keys ["name", "country", "ranking", "players"]
+        :rtype: dict
+        """
+        name = self.find("h1", class_="profile-team-name")
+        country = self.find("div", class_="team-country")
+
+        # Ranking is the first profile stat, shown as "#5"
+        ranking = None
+        for stat in self.find_all("div", class_="profile-team-stat"):
+            if "ranking" in stat.text.lower():
+                numbers = re.findall(r"#(\d+)", stat.text)
+                ranking = (int(numbers[0]) if numbers else None)
+                break
+
+        # Current lineup links contain the player id
+        players = []
+        lineup = self.find("div", class_="bodyshot-team")
+        if lineup is not None:
+            for link in lineup.find_all("a", href=True):
+                ids = extract_ids(link["href"])
+                if ids:
+                    players.append(int(ids[0]))
+
+        return {"name": (name.text.strip() if name is not None else None),
+                "country": (country.text.strip() if country is not None else None),
+                "ranking": ranking,
+                "players": players}
+
+    def parse_player_profile(self: Tag) -> dict:
+        """
+        Receives the parsed html of a player profile page and extracts the player details. Fields missing from the
+        page layout are returned as None
+        :return: dict with keys ["nick", "name", "country", "age", "team_id"]
+        :rtype: dict
+        """
+        nick = self.find("h1", class_="playerNickname")
+        name = self.find("div", class_="playerRealname")
+        flag = (name.find("img") if name is not None else None)
+
+        age = None
+        age_div = self.find("div", class_="playerAge")
+        if age_div is not None:
+            numbers = re.findall(r"\d+", age_div.text)
+            age = (int(numbers[0]) if numbers else None)
+
+        team_id = None
+        team_div = self.find("div", class_="playerTeam")
+        if team_div is not None and team_div.a is not None:
+            ids = extract_ids(team_div.a["href"])
+            team_id = (int(ids[0]) if ids else None)
+
+        return {"nick": (nick.text.strip() if nick is not None else None),
+                "name": (name.text.strip() if name is not None else None),
+                "country": (flag["title"] if flag is not None and flag.has_attr("title") else None),
+                "age": age,
+                "team_id": team_id}
+
+    def parse_map_stats(self: Tag) -> dict:
+        """
+        Receives the parsed html of a mapstatsid page and extracts team level stats, the round by round timeline and
+        the player scoreboard. Team 1 is the left team of the page, same as first_team in the match page results
+        :return: dict with keys ["team1", "team2", "rounds", "players"]. Rounds are lists [round, team, outcome] with
+                 team 1 or 2 as the round winner and the outcome icon name (ct_win, t_win, bomb_exploded, bomb_defused,
+                 stopwatch). Players are lists [team, playerID, kills, headshots, assists, flash_assists, deaths,
+                 kast, adr, fk_diff, rating]
+        :rtype: dict
+        """
+        def number(text: str) -> Union[float, None]:
+            # Stats are shown as "20", "70.0%", "+3" or "-" when not available
+            text = text.strip().rstrip("%")
+            try:
+                return float(text)
+            except ValueError:
+                return None
+
+        def team_info(div: Tag) -> dict:
+            link = (div.find("a", href=True) if div is not None else None)
+            ids = (extract_ids(link["href"]) if link is not None else [])
+            return {"id": (int(ids[0]) if ids else None),
+                    "name": (link.text.strip() if link is not None else None),
+                    "first_kills": None,
+                    "clutches": None,
+                    "rating": None}
+
+        team1 = team_info(self.find("div", class_="team-left"))
+        team2 = team_info(self.find("div", class_="team-right"))
+
+        # Info rows show both teams values as "left : right"
+        keys = {"first kills": "first_kills", "clutches won": "clutches", "team rating": "rating"}
+        for row in self.find_all("div", class_="match-info-row"):
+            label = row.text.lower()
+            values = row.find("div", class_="right")
+            for text, key in keys.items():
+                if text in label and values is not None and ":" in values.text:
+                    left, right = values.text.split(":")[:2]
+                    team1[key] = number(left)
+                    team2[key] = number(right)
+
+        # Round history has one row per team, regulation and overtime are in different containers
+        rounds = []
+        played = 0
+        for container in self.find_all("div", class_="round-history-con"):
+            rows = container.find_all("div", class_="round-history-team-row")
+            length = 0
+            for team, row in enumerate(rows[:2], 1):
+                outcomes = row.find_all("img", class_="round-history-outcome")
+                length = max(length, len(outcomes))
+                for position, img in enumerate(outcomes, played + 1):
+                    outcome = img.get("src", "").split("/")[-1].split(".")[0]
+                    # Rounds lost by the team are shown with an empty icon
+                    if outcome and outcome != "emptyHistory":
+                        rounds.append([position, team, outcome])
+            played += length
+        rounds.sort()
+
+        # Scoreboards are in the same order as the teams
+        players = []
+        for team, table in enumerate(self.find_all("table", class_="stats-table")[:2], 1):
+            for row in table.find_all("tr"):
+                player = row.find("td", class_="st-player")
+                if player is None or player.a is None:
+                    continue
+                kills = re.findall(r"\d+", row.find("td", class_="st-kills").text)
+                assists = re.findall(r"\d+", row.find("td", class_="st-assists").text)
+                players.append([team,
+                                int(extract_ids(player.a["href"])[0]),
+                                (int(kills[0]) if kills else None),
+                                (int(kills[1]) if len(kills) > 1 else None),
+                                (int(assists[0]) if assists else None),
+                                (int(assists[1]) if len(assists) > 1 else None),
+                                number(row.find("td", class_="st-deaths").text),
+                                number(row.find("td", class_="st-kdratio").text),
+                                number(row.find("td", class_="st-adr").text),
+                                number(row.find("td", class_="st-fkdiff").text),
+                                number(row.find("td", class_="st-rating").text)])
+
+        return {"team1": team1, "team2": team2, "rounds": rounds, "players": players}
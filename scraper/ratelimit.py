@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request made by a Scraper, its thread pools and the async client. Up to burst
+    requests can be made at once, after that requests are spaced to rate per second on average, no matter how many
+    workers are making them
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 15):
+        """
+        :param rate: average requests per second allowed
+        :type rate: float
+        :param burst: requests that can be made back to back before the rate applies
+        :type burst: int
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Takes a token and returns the seconds the caller has to wait before using it
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens can go negative, each waiting caller reserves its own place in the line
+            self.tokens -= 1
+            return (-self.tokens / self.rate if self.tokens < 0 else 0.0)
+
+    def acquire(self) -> None:
+        """
+        Blocks until a request can be made
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """
+        Waits without blocking the event loop until a request can be made
+        """
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+# Every Scraper shares this limiter unless one is given, so parallel crawlers in a process don't add up their rates
+DEFAULT_LIMITER = RateLimiter()
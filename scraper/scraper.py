@@ -1,7 +1,11 @@
-from typing import Union
+from typing import Iterator, Union
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from dateutil.parser import parse
-from .extractor import extract_ids, Parser
+from .cache import EntityCache
+from .extractor import extract_ids, fast_parse_match_links, Parser
+from .ratelimit import DEFAULT_LIMITER, RateLimiter
 
 import time
 import requests
@@ -13,11 +17,21 @@ class Scraper:
     This class handles requests and information extraction
     """
 
-    def __init__(self):
+    def __init__(self, limiter: RateLimiter = None):
+        """
+        :param limiter: rate limit applied to every request, defaults to the one shared by all scrapers in the process
+        :type limiter: RateLimiter
+        """
+        self.limiter = (limiter if limiter is not None else DEFAULT_LIMITER)
         self.base = "https://www.hltv.org/"
         self.ranks = "https://www.hltv.org/ranking/teams/"
         self.results = "https://www.hltv.org/results?team="
         self.matches = "https://www.hltv.org/results?"
+        # HLTV redirects entity pages to the right slug, only the id is needed
+        self.entities = {"event": "https://www.hltv.org/events/{}/-",
+                         "team": "https://www.hltv.org/team/{}/-",
+                         "player": "https://www.hltv.org/player/{}/-",
+                         "mapstats": "https://www.hltv.org/stats/matches/mapstatsid/{}/-"}
 
     def get_teamids(self) -> list[str]:
         """
@@ -26,13 +40,25 @@ class Scraper:
         :rtype: list
         """
         try:
+            self.limiter.acquire()
             html = requests.get(self.ranks)
             html.raise_for_status()
         except requests.exceptions.HTTPError as e:
             print("An exception was raised:", e)
             raise e
 
-        soup = BeautifulSoup(html.text, "html.parser")
+        return self.parse_teamids(html.text)
+
+    @staticmethod
+    def parse_teamids(html: str) -> list[str]:
+        """
+        Parses the ranking page html into the top 30 team ids, shared by the sync and async clients
+        :param html: ranking page html
+        :type html: str
+        :return: list with top 30 team ids
+        :rtype: list
+        """
+        soup = BeautifulSoup(html, "html.parser")
 
         # Find team links
         teamlinks = soup.find_all('a', class_="moreLink", text="HLTV Team profile")
@@ -43,16 +69,21 @@ class Scraper:
 
         return team_ids
 
-    def get_last_matches(self, limit: int = 100) -> list[tuple]:
+    def get_last_matches(self, limit: int = 100, summary: bool = False, fast: bool = False) -> list[Union[tuple, dict]]:
         """
         Returns all the last limit specified matches posted on hltv
         :param limit: limits the number of retrieved matches, defaults to 100 to prevent extracting all hltv records
         :type limit: int
-        :return: list of tuples with format (matchID, matchlink)
-        :rtype: List[tuple(int, str)]
+        :param summary: if True, return the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: list of tuples with format (matchID, matchlink) or list of dicts returned by Parser.parse_match_summary
+        :rtype: List[tuple(int, str)], List[dict]
         """
         try:
             session = requests.Session()
+            self.limiter.acquire()
             html = session.get(self.matches)
             html.raise_for_status()
 
@@ -60,11 +91,8 @@ class Scraper:
             print("An exception was raised:", e)
             raise e
 
-        soup = BeautifulSoup(html.text, "html.parser")
-
         # Obtain match links and get max matches number listed on hltv to limit requests
-        matches = [Parser.parse_match_links(match) for match in soup.find_all("div", class_="result-con")]
-        max_matches = int(soup.find("span", class_="pagination-data").text.split()[-1])
+        matches, max_matches = self.parse_results_page(html.content, summary, fast)
 
         offset = 0
         while max_matches > 100:
@@ -78,6 +106,7 @@ class Scraper:
 
             # Make request
             try:
+                self.limiter.acquire()
                 html = session.get(offset_url)
                 html.raise_for_status()
 
@@ -86,9 +115,7 @@ class Scraper:
                 raise e
 
             # Parse and add matches to match list
-            soup = BeautifulSoup(html.text, "html.parser")
-            for match in soup.find_all("div", class_="result-con"):
-                matches.append(Parser.parse_match_links(match))
+            matches.extend(self.parse_results_page(html.content, summary, fast)[0])
 
             # Progress to base case, page has less than 100 matches which means all match links were scraped
             max_matches -= 100
@@ -103,15 +130,20 @@ class Scraper:
         except IndexError:
             raise IndexError
 
-    def get_matches_teamid(self, teamid: Union[str, int], limit: int = 100) -> list[tuple]:
+    def get_matches_teamid(self, teamid: Union[str, int], limit: int = 100, summary: bool = False,
+                           fast: bool = False) -> list[Union[tuple, dict]]:
         """
         Obtains all the matches for a specified team
         :param teamid: str with team id numbers
         :type teamid: str
         :param limit: specifies how many matches to return
         :type limit: int
-        :return: list with all the links to historical matches results
-        :rtype: List[tuple(id, link)]
+        :param summary: if True, return the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: list with all the links to historical matches results or list of match summary dicts
+        :rtype: List[tuple(id, link)], List[dict]
         """
         # Check for valid data types
         if isinstance(teamid, int):
@@ -124,6 +156,7 @@ class Scraper:
         # Get team historical matches results
         try:
             session = requests.Session()
+            self.limiter.acquire()
             html = session.get(link)
             html.raise_for_status()
 
@@ -131,12 +164,8 @@ class Scraper:
             print("An exception was raised:", e)
             raise e
 
-        soup = BeautifulSoup(html.text, "html.parser")
-        # Obtain all competitive matches number for offset
-        matches_number = int(soup.find("span", class_="pagination-data").text.split()[-1])
-
-        # Obtain all matches links to scrape match data
-        matches = [Parser.parse_match_links(match) for match in soup.find_all("div", class_="result-con")]
+        # Obtain all matches links to scrape match data and all competitive matches number for offset
+        matches, matches_number = self.parse_results_page(html.content, summary, fast)
 
         # If team has more matches than the max shown in the page, loop to get the rest
         offset = 0
@@ -152,6 +181,7 @@ class Scraper:
             # Make request
             start = time.time()
             try:
+                self.limiter.acquire()
                 html = session.get(offset_url)
                 html.raise_for_status()
 
@@ -160,9 +190,7 @@ class Scraper:
                 raise e
 
             # Parse and add matches to match list
-            soup = BeautifulSoup(html.text, "html.parser")
-            for match in soup.find_all("div", class_="result-con"):
-                matches.append(Parser.parse_match_links(match))
+            matches.extend(self.parse_results_page(html.content, summary, fast)[0])
 
             # Progress to base case, page has less than 100 matches which means all match links were scraped
             matches_number -= 100
@@ -177,6 +205,271 @@ class Scraper:
 
         return matches
 
+    def get_matches_eventid(self, eventids: Union[str, int, list], summary: bool = False, max_workers: int = 4,
+                            fast: bool = False) -> Iterator[Union[tuple, dict]]:
+        """
+        Crawls only the results pages of the specified events and yields their matches
+        :param eventids: event id or list of event ids
+        :type eventids: str, int, list
+        :param summary: if True, yield the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param max_workers: number of results pages requested at the same time
+        :type max_workers: int
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: generator of tuples with format (matchID, matchlink) ready for start_matches_queue
+        :rtype: Iterator[tuple(int, str)], Iterator[dict]
+        """
+        return self.get_matches_daterange(eventids=eventids, summary=summary, max_workers=max_workers, fast=fast)
+
+    def get_matches_daterange(self, start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+                              eventids: Union[str, int, list] = None, summary: bool = False, max_workers: int = 4,
+                              fast: bool = False) -> Iterator[Union[tuple, dict]]:
+        """
+        Crawls only the results pages between two dates, optionally scoped to some events, and yields their matches
+        :param start_date: first day to include, str in format YYYY-MM-DD or date object
+        :type start_date: str, date
+        :param end_date: last day to include, str in format YYYY-MM-DD or date object
+        :type end_date: str, date
+        :param eventids: event id or list of event ids to filter results, defaults to all events
+        :type eventids: str, int, list
+        :param summary: if True, yield the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param max_workers: number of results pages requested at the same time
+        :type max_workers: int
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: generator of tuples with format (matchID, matchlink) ready for start_matches_queue
+        :rtype: Iterator[tuple(int, str)], Iterator[dict]
+        """
+        links = self._results_links(start_date, end_date, eventids)
+
+        return self._crawl_results_pages(links, summary, max_workers, fast)
+
+    def _results_links(self, start_date: Union[str, date] = None, end_date: Union[str, date] = None,
+                       eventids: Union[str, int, list] = None) -> list[str]:
+        """
+        Builds the filtered results listing urls, one per event, ending with "&" so the offset can be appended
+        """
+        if start_date is None and end_date is None and eventids is None:
+            raise ValueError("Please provide at least a date or an event id to scope the results pages")
+
+        # Build query string shared by every results page
+        query = ""
+        if start_date:
+            query += "startDate=" + (start_date.isoformat() if isinstance(start_date, date) else start_date) + "&"
+        if end_date:
+            query += "endDate=" + (end_date.isoformat() if isinstance(end_date, date) else end_date) + "&"
+
+        # Each event has its own results listing, without events a single listing filtered by dates is crawled
+        if eventids is None:
+            links = [self.matches + query]
+        elif isinstance(eventids, (str, int)):
+            links = [self.matches + query + "event=" + str(eventids) + "&"]
+        elif isinstance(eventids, list):
+            links = [self.matches + query + "event=" + str(x) + "&" for x in eventids]
+        else:
+            raise TypeError("Invalid eventids type for get_matches_daterange, only str, int or list are allowed")
+
+        return links
+
+    def _crawl_results_pages(self, links: list[str], summary: bool = False, max_workers: int = 4,
+                             fast: bool = False) -> Iterator[Union[tuple, dict]]:
+        """
+        Requests the first page of every listing link concurrently, reads how many matches each one has and then
+        requests the remaining offset pages concurrently too, yielding matches as pages are parsed
+        :param links: results listing urls ending with "?" or "&" so the offset can be appended
+        :type links: list[str]
+        :param summary: if True, yield the series summary parsed from each listing row instead of (id, link) tuples
+        :type summary: bool
+        :param max_workers: number of results pages requested at the same time
+        :type max_workers: int
+        :param fast: if True, extract (id, link) tuples with regexes from the raw page, see fast_parse_match_links
+        :type fast: bool
+        :return: generator of tuples with format (matchID, matchlink) or match summary dicts
+        :rtype: Iterator[tuple(int, str)], Iterator[dict]
+        """
+        session = requests.Session()
+
+        def request_page(url: str) -> tuple[list, Union[int, None]]:
+            try:
+                self.limiter.acquire()
+                html = session.get(url)
+                html.raise_for_status()
+
+            except requests.exceptions.HTTPError as e:
+                print("An exception was raised:", e)
+                raise e
+
+            return self.parse_results_page(html.content, summary, fast)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            offset_links = []
+            for link, (matches, matches_number) in zip(links, executor.map(request_page, links)):
+                yield from matches
+
+                # Listings without matches have no pagination span and nothing else to request
+                if matches_number is None:
+                    continue
+                offset_links.extend([link + "offset=" + str(offset) for offset in range(100, matches_number, 100)])
+
+            for matches, _ in executor.map(request_page, offset_links):
+                yield from matches
+
+    @staticmethod
+    def parse_results_page(content: bytes, summary: bool = False,
+                           fast: bool = False) -> tuple[list, Union[int, None]]:
+        """
+        Parses a results listing page into its matches and the total number of matches shown by the pagination, shared
+        by the sync and async clients
+        :param content: raw bytes of a results listing page
+        :type content: bytes
+        :param summary: if True, parse each listing row with Parser.parse_match_summary instead of (id, link) tuples
+        :type summary: bool
+        :param fast: if True, try the regex extractor on the raw bytes first and use the tree parser only if it fails
+        :type fast: bool
+        :return: tuple with (list of matches, total matches or None if the page has no pagination)
+        :rtype: tuple
+        """
+        # Regex extraction only knows about (id, link) tuples, summaries always need the tree
+        if fast and not summary:
+            parsed = fast_parse_match_links(content)
+            if parsed is not None:
+                return parsed
+
+        soup = BeautifulSoup(content.decode(errors="replace"), "html.parser")
+        parse_row = (Parser.parse_match_summary if summary else Parser.parse_match_links)
+        matches = [parse_row(match) for match in soup.find_all("div", class_="result-con")]
+        pagination = soup.find("span", class_="pagination-data")
+
+        return matches, (int(pagination.text.split()[-1]) if pagination else None)
+
+    def get_event_info(self, eventid: Union[str, int], session: requests.Session = False) -> dict:
+        """
+        Obtains the event details (dates, location, prize pool, tier) from its event page
+        :param eventid: event id
+        :type eventid: str, int
+        :param session: requests session object to leverage one connection across requests
+        :type session: requests.Session
+        :return: dict returned by Parser.parse_event_info with the event id
+        :rtype: dict
+        """
+        return self._request_entity("event", eventid, session)
+
+    def get_team_info(self, teamid: Union[str, int], session: requests.Session = False) -> dict:
+        """
+        Obtains the team details (name, country, ranking, lineup) from its profile page
+        :param teamid: team id
+        :type teamid: str, int
+        :param session: requests session object to leverage one connection across requests
+        :type session: requests.Session
+        :return: dict returned by Parser.parse_team_profile with the team id
+        :rtype: dict
+        """
+        return self._request_entity("team", teamid, session)
+
+    def get_player_info(self, playerid: Union[str, int], session: requests.Session = False) -> dict:
+        """
+        Obtains the player details (name, country, age, current team) from its profile page
+        :param playerid: player id
+        :type playerid: str, int
+        :param session: requests session object to leverage one connection across requests
+        :type session: requests.Session
+        :return: dict returned by Parser.parse_player_profile with the player id
+        :rtype: dict
+        """
+        return self._request_entity("player", playerid, session)
+
+    def request_map_stats(self, mapid: Union[str, int], session: requests.Session = False) -> dict:
+        """
+        Obtains the detailed stats of a played map (round history, first kills, clutches, rating) from its mapstatsid
+        page, the id is the mapID of the map results returned by request_match_info
+        :param mapid: map stats id
+        :type mapid: str, int
+        :param session: requests session object to leverage one connection across requests
+        :type session: requests.Session
+        :return: dict returned by Parser.parse_map_stats with the map id
+        :rtype: dict
+        """
+        return self._request_entity("mapstats", mapid, session)
+
+    def _request_entity(self, kind: str, entity_id: Union[str, int], session: requests.Session = False) -> dict:
+        try:
+            self.limiter.acquire()
+            html = (session or requests).get(self.entities[kind].format(entity_id))
+            html.raise_for_status()
+
+        except requests.exceptions.HTTPError as e:
+            print("An exception was raised:", e)
+            raise e
+
+        return self.parse_entity_page(kind, html.text, entity_id)
+
+    @staticmethod
+    def parse_entity_page(kind: str, html: str, entity_id: Union[str, int]) -> dict:
+        """
+        Parses an event, team, player or map stats page, shared by the sync and async clients
+        :param kind: "event", "team", "player" or "mapstats"
+        :type kind: str
+        :param html: page html
+        :type html: str
+        :param entity_id: id of the requested entity
+        :type entity_id: str, int
+        :return: dict returned by the Parser method of the kind, with the entity id
+        :rtype: dict
+        """
+        parsers = {"event": Parser.parse_event_info,
+                   "team": Parser.parse_team_profile,
+                   "player": Parser.parse_player_profile,
+                   "mapstats": Parser.parse_map_stats}
+
+        info = parsers[kind](BeautifulSoup(html, "html.parser"))
+        info["id"] = int(entity_id)
+
+        return info
+
+    def get_entities(self, kind: str, ids: list, cache: EntityCache = None, max_workers: int = 4) -> dict:
+        """
+        Obtains the details of many events, teams, players or map stats. Duplicated ids are requested once, ids with a
+        fresh cache entry are not requested at all and the rest are requested concurrently and stored in the cache
+        :param kind: "event", "team", "player" or "mapstats"
+        :type kind: str
+        :param ids: entity ids, usually the index of a dimension DataFrame
+        :type ids: list
+        :param cache: persistent cache shared between runs, without one every id is requested
+        :type cache: EntityCache
+        :param max_workers: number of pages requested at the same time
+        :type max_workers: int
+        :return: dict with id as key and the parsed entity dict as value, ids that failed are left out
+        :rtype: dict
+        """
+        if kind not in self.entities:
+            raise ValueError("Invalid entity kind, only event, team, player or mapstats are allowed")
+
+        # Coalesce duplicated ids of the batch before looking at the cache
+        ids = list(dict.fromkeys(int(x) for x in ids))
+        found = (cache.get_many(kind, ids) if cache is not None else {})
+        missing = [x for x in ids if x not in found]
+
+        session = requests.Session()
+
+        def request(entity_id: int) -> Union[dict, None]:
+            try:
+                return self._request_entity(kind, entity_id, session)
+            except Exception as e:
+                print("An exception was raised on {} {}:".format(kind, entity_id), e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for entity_id, info in zip(missing, executor.map(request, missing)):
+                if info is None:
+                    continue
+                found[entity_id] = info
+                if cache is not None:
+                    cache.set(kind, entity_id, info)
+
+        return found
+
     def request_match_info(self, match_id: tuple, session: requests.Session = False) -> dict:
         """
         Extracts all relevant match information and puts it into a dictionary for further use
@@ -187,10 +480,25 @@ class Scraper:
         :return: dictionary with match information
         :rtype: dict
         """
+        html = self.request_match_page(match_id, session)
+
+        return self.parse_match_page(html.text, match_id)
+
+    def request_match_page(self, match_id: tuple, session: requests.Session = False) -> requests.Response:
+        """
+        Requests a match page without parsing it, exceptions raised here are always network errors
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :param session: requests session object to leverage one connection across requests
+        :type session: requests.Session
+        :return: match page response
+        :rtype: requests.Response
+        """
         # Get match link
         link = self.base + match_id[1]
 
         # Make html request
+        self.limiter.acquire()
         try:
             if session:
                 html = session.get(link)
@@ -203,7 +511,21 @@ class Scraper:
             print(e)
             raise e
 
-        soup = BeautifulSoup(html.text, "html.parser")
+        return html
+
+    @staticmethod
+    def parse_match_page(html: str, match_id: tuple) -> dict:
+        """
+        Parses a match page html into the dictionary returned by request_match_info, shared by the sync and async
+        clients and by anything that stores pages to parse them later
+        :param html: match page html
+        :type html: str
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :return: dictionary with match information
+        :rtype: dict
+        """
+        soup = BeautifulSoup(html, "html.parser")
 
         # Find both divs containing team info (id, name, result)
         match_team_results_info = soup.find_all("div", class_=re.compile(r"team[0-9]+-gradient"))
@@ -0,0 +1,211 @@
+"""
+Local read-through HTTP/JSON service around HltvApi, so many processes can share parsed matches instead of requesting
+and parsing the same pages. Usage: python cli.py serve --archive matches.hltv --port 8080
+
+Routes:
+    GET /matches/<matchid>[?link=<matchlink>]       match dictionary returned by request_match_info
+    GET /matches/<matchid>/frames                   normalized DataFrames of the match, keyed by sinks.TABLE_NAMES
+    GET /teams/<teamid>/matches[?limit=<n>]         series summaries of the last team matches
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlparse
+from archive import MatchArchive
+from hltvApi import HltvApi
+from sinks import TABLE_NAMES
+
+import hashlib
+import json
+import re
+import threading
+import time
+import requests
+
+# Largest team listing served, 10 results pages
+MAX_LIMIT = 1000
+
+
+class MatchService:
+    """
+    Answers match, team matches and DataFrame queries from an in-memory LRU of serialized responses, backed by a
+    MatchArchive so matches are only requested once across restarts. Concurrent requests for the same key share one
+    fetch and parse (single-flight) and every response carries an ETag so clients can revalidate with If-None-Match.
+    Match pages are stored permanently, team listings expire after listing_ttl seconds since new matches are added
+    """
+
+    def __init__(self, api: HltvApi = None, archive: MatchArchive = None, capacity: int = 1024,
+                 listing_ttl: float = 300):
+        """
+        :param api: HltvApi used to request and normalize matches
+        :type api: HltvApi
+        :param archive: on disk store of parsed matches, read before requesting a page and appended after
+        :type archive: MatchArchive
+        :param capacity: number of responses kept in memory
+        :type capacity: int
+        :param listing_ttl: seconds a team listing is served before being requested again
+        :type listing_ttl: float
+        """
+        self.api = (api if api is not None else HltvApi())
+        self.archive = archive
+        self.capacity = capacity
+        self.listing_ttl = listing_ttl
+
+        # Entries are (body, etag, expiry), most recently used at the end
+        self.lru = OrderedDict()
+        # Futures of the keys being loaded, followers wait on them instead of loading again
+        self.flights = {}
+        self.lock = threading.Lock()
+        # MatchArchive seeks a shared file handle, reads and appends are serialized
+        self.archive_lock = threading.Lock()
+
+    def _cached(self, key: tuple, loader: Callable[[], object], ttl: float = None) -> tuple:
+        """
+        Returns the (body, etag) of a key from the LRU, or loads it once no matter how many threads ask for it
+        """
+        with self.lock:
+            entry = self.lru.get(key)
+            if entry is not None and (entry[2] is None or entry[2] > time.time()):
+                self.lru.move_to_end(key)
+                return entry[:2]
+
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Future()
+
+        if not leader:
+            return flight.result()
+
+        try:
+            body = json.dumps(loader(), separators=(",", ":")).encode()
+        except Exception as e:
+            with self.lock:
+                del self.flights[key]
+            flight.set_exception(e)
+            raise
+
+        result = (body, '"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest()))
+        # Entry is stored before the flight is removed so no thread can start a second load in between
+        with self.lock:
+            self.lru[key] = (*result, (time.time() + ttl if ttl is not None else None))
+            self.lru.move_to_end(key)
+            while len(self.lru) > self.capacity:
+                self.lru.popitem(last=False)
+            del self.flights[key]
+        flight.set_result(result)
+
+        return result
+
+    def _load_match(self, match_id: int, link: str = None) -> dict:
+        if self.archive is not None:
+            with self.archive_lock:
+                match = self.archive.get(match_id)
+            if match is not None:
+                return match
+
+        # HLTV redirects to the right slug when only the id is known
+        match = self.api.request_match_info((match_id, link or "/matches/{}/-".format(match_id)))
+        if self.archive is not None:
+            with self.archive_lock:
+                self.archive.append(match)
+
+        return match
+
+    def match(self, match_id: int, link: str = None) -> tuple:
+        """
+        Returns the serialized match dictionary and its ETag
+        :param match_id: match id number
+        :type match_id: int
+        :param link: match link, only needed if the match is not archived yet
+        :type link: str
+        :return: tuple with (json body, etag)
+        :rtype: tuple
+        """
+        return self._cached(("match", match_id), lambda: self._load_match(match_id, link))
+
+    def frames(self, match_id: int, link: str = None) -> tuple:
+        """
+        Returns the normalized DataFrames of a match serialized with orient="split", and their ETag
+        """
+        def load() -> dict:
+            match = json.loads(self.match(match_id, link)[0])
+            frames = self.api.normalize_matches([match])
+            return {name: json.loads(df.to_json(orient="split", date_format="iso"))
+                    for name, df in zip(TABLE_NAMES, frames)}
+
+        return self._cached(("frames", match_id), load)
+
+    def team_matches(self, team_id: int, limit: int = 100) -> tuple:
+        """
+        Returns the serialized series summaries of the last matches of a team and their ETag
+        """
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError("limit must be between 1 and {}".format(MAX_LIMIT))
+        return self._cached(("team", team_id, limit),
+                            lambda: self.api.get_matches_teamid(team_id, limit=limit, summary=True)[:limit],
+                            ttl=self.listing_ttl)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    routes = [(re.compile(r"^/matches/(\d+)/?$"), "match"),
+              (re.compile(r"^/matches/(\d+)/frames/?$"), "frames"),
+              (re.compile(r"^/teams/(\d+)/matches/?$"), "team_matches")]
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+
+        for pattern, route in self.routes:
+            found = pattern.match(url.path)
+            if found is not None:
+                break
+        else:
+            return self.reply(404, json.dumps({"error": "Unknown route"}).encode())
+
+        # get_matches_teamid treats 0 as no limit and would crawl every listing page of the team
+        limit = query.get("limit", ["100"])[0]
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_LIMIT:
+            return self.reply(400, json.dumps(
+                {"error": "limit must be a positive integer up to {}".format(MAX_LIMIT)}).encode())
+
+        try:
+            if route == "team_matches":
+                body, etag = service.team_matches(int(found.group(1)), int(limit))
+            else:
+                body, etag = getattr(service, route)(int(found.group(1)), query.get("link", [None])[0])
+        except requests.exceptions.RequestException as e:
+            return self.reply(502, json.dumps({"error": str(e)}).encode())
+        except Exception as e:
+            return self.reply(500, json.dumps({"error": repr(e)}).encode())
+
+        if etag in self.headers.get("If-None-Match", ""):
+            return self.reply(304, b"", etag)
+        self.reply(200, body, etag)
+
+    def reply(self, status: int, body: bytes, etag: str = None) -> None:
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(service: MatchService, host: str = "127.0.0.1", port: int = 8080) -> None:
+    """
+    Serves a MatchService until interrupted, every request is handled in its own thread
+    """
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.service = service
+    print("Serving on http://{}:{}".format(host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,132 @@
+from abc import ABC, abstractmethod
+
+import os
+import sqlite3
+import pandas as pd
+
+
+# Names used for the six DataFrames returned by HltvApi.start_matches_queue, in the same order
+TABLE_NAMES = ["TeamDim", "EventDim", "PlayerDim", "MatchDim", "MapsFact", "PlayersFact"]
+
+# Names used for the three DataFrames returned by HltvApi.start_mapstats_queue, in the same order
+MAP_TABLE_NAMES = ["MapTeamsFact", "RoundsFact", "MapPlayersFact"]
+
+# Dimension DataFrames are indexed by their id, the index is stored with the column name of queries.py
+INDEX_LABELS = {"TeamDim": "teamId", "EventDim": "eventId", "PlayerDim": "playerId"}
+INDEXED_TABLES = list(INDEX_LABELS)
+
+
+class Sink(ABC):
+    """
+    Destination for the chunks of normalized DataFrames flushed by HltvApi.start_matches_queue. Every chunk is appended
+    to the previous ones so a run can be resumed or split without rewriting stored data
+    """
+
+    @abstractmethod
+    def write(self, frames: list[pd.DataFrame], names: list[str] = TABLE_NAMES) -> None:
+        """
+        Appends a chunk of DataFrames to the sink
+        :param frames: list of DataFrames ordered as names
+        :type frames: list[pd.DataFrame]
+        :param names: table name of each DataFrame, TABLE_NAMES or MAP_TABLE_NAMES
+        :type names: list[str]
+        """
+        ...
+
+    def keys(self, name: str, column: str) -> set:
+        """
+        Returns the distinct values of a column already written to a table, so a queue run again over the same sink
+        can skip what was written before
+        :param name: table name, from TABLE_NAMES or MAP_TABLE_NAMES
+        :type name: str
+        :param column: column name
+        :type column: str
+        :return: set with the stored values, empty if the table was not written yet
+        :rtype: set
+        """
+        return set()
+
+    def close(self) -> None:
+        """
+        Releases any resource held by the sink, called once the queue is finished
+        """
+        pass
+
+
+class CsvSink(Sink):
+    """
+    Appends each table to its own csv file inside a directory, header is only written when the file is created
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, frames: list[pd.DataFrame], names: list[str] = TABLE_NAMES) -> None:
+        for name, df in zip(names, frames):
+            path = os.path.join(self.directory, name + ".csv")
+            df.to_csv(path, mode="a", header=not os.path.exists(path), index=name in INDEXED_TABLES,
+                      index_label=INDEX_LABELS.get(name))
+
+    def keys(self, name: str, column: str) -> set:
+        path = os.path.join(self.directory, name + ".csv")
+        if not os.path.exists(path):
+            return set()
+        return set(pd.read_csv(path, usecols=[column])[column].dropna().tolist())
+
+
+class SqliteSink(Sink):
+    """
+    Appends each table to a SQLite database, tables are created by pandas on the first chunk
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+
+    def write(self, frames: list[pd.DataFrame], names: list[str] = TABLE_NAMES) -> None:
+        # Whole chunk is committed at once so a failure never leaves half a chunk stored
+        with self.connection:
+            for name, df in zip(names, frames):
+                df.to_sql(name, self.connection, if_exists="append", index=name in INDEXED_TABLES,
+                          index_label=INDEX_LABELS.get(name))
+
+    def keys(self, name: str, column: str) -> set:
+        exists = self.connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                         (name,)).fetchone()
+        if exists is None:
+            return set()
+        return {row[0] for row in self.connection.execute('SELECT DISTINCT "{}" FROM "{}"'.format(column, name))
+                if row[0] is not None}
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class ParquetSink(Sink):
+    """
+    Writes each chunk as a new part file inside one directory per table (requires pyarrow or fastparquet)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        for name in TABLE_NAMES:
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+
+        # Continue numbering after existing parts so previous runs are not overwritten
+        tables = [os.path.join(directory, name) for name in TABLE_NAMES + MAP_TABLE_NAMES]
+        self.part = max([len(os.listdir(path)) for path in tables if os.path.isdir(path)])
+
+    def write(self, frames: list[pd.DataFrame], names: list[str] = TABLE_NAMES) -> None:
+        for name, df in zip(names, frames):
+            # Map stats tables are only created when the map stats queue writes to this sink
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+            path = os.path.join(self.directory, name, "part-{:05d}.parquet".format(self.part))
+            df.rename_axis(INDEX_LABELS.get(name)).to_parquet(path, index=name in INDEXED_TABLES)
+        self.part += 1
+
+    def keys(self, name: str, column: str) -> set:
+        path = os.path.join(self.directory, name)
+        if not os.path.isdir(path) or not os.listdir(path):
+            return set()
+        return set(pd.read_parquet(path, columns=[column])[column].dropna().tolist())
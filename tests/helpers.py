@@ -0,0 +1,105 @@
+"""
+Synthetic matches and stand-ins for the network and the sinks shared by the tests
+"""
+from hltvApi import HltvApi
+from sinks import Sink
+
+
+def make_match(match_id: int, kd: str = "16-10", score: str = "16") -> dict:
+    """
+    Builds the smallest dictionary returned by request_match_info with one map and one player per team
+    """
+    def player(player_id: int) -> dict:
+        return {"playerID": player_id, "ct": {"kd": kd, "adr": 80.5}, "t": {"kd": "5-7", "adr": 60.0}}
+
+    return {"team1": {"id": 1, "name": "Team A", "result": 1, "won": True},
+            "team2": {"id": 2, "name": "Team B", "result": 0, "won": False},
+            "event": {"id": "10", "name": "event", "link": "/events/10/event"},
+            "match_info": {"bestof": 1, "instance": "Group stage", "lan": True, "banphase": [],
+                           "date": "2021-05-01 18:00:00", "match_id": match_id, "event_id": 10},
+            "map_results": {"Inferno": {"mapID": match_id * 10,
+                                        "first_team": {"team": "Team A", "score": score, "won": True, "pick": True,
+                                                       "round_results": [("ct", 9), ("t", 7)]},
+                                        "second_team": {"team": "Team B", "score": "10", "won": False,
+                                                        "pick": False, "round_results": [("t", 6), ("ct", 4)]},
+                                        "global_score": (score, "10"),
+                                        "overtime": False}},
+            "player_stats": {"global_stats": {"first_team": {"a": {"playerID": 100, "playerName": "A",
+                                                                   "nationality": "Spain"}},
+                                              "second_team": {"b": {"playerID": 200, "playerName": "B",
+                                                                    "nationality": "France"}}},
+                             "Inferno": {"first_team": {"a": player(100)}, "second_team": {"b": player(200)}}}}
+
+
+class MemorySink(Sink):
+    """
+    Keeps every written chunk in memory
+    """
+
+    def __init__(self):
+        self.written = []
+
+    def write(self, frames, names=None) -> None:
+        self.written.append(frames)
+
+
+class FailingSink(MemorySink):
+    """
+    Sink whose writes fail the first failures times (always if None), then keeps the written chunks in memory
+    """
+
+    def __init__(self, failures: int = None):
+        super().__init__()
+        self.failures = failures
+
+    def write(self, frames, names=None) -> None:
+        if self.failures is None or self.failures > 0:
+            self.failures = (self.failures - 1 if self.failures is not None else None)
+            raise OSError("disk full")
+        super().write(frames, names)
+
+
+class StubApi(HltvApi):
+    """
+    Parses every page into a synthetic match and serves pages without requests
+    """
+
+    def request_match_page(self, match_id: tuple, session=None):
+        return type("Response", (), {"text": "", "content": b"", "encoding": "utf-8"})()
+
+    @staticmethod
+    def parse_match_page(html: str, match_id: tuple) -> dict:
+        return make_match(match_id[0])
+
+
+def make_listing(match_ids: list, total: str = None, row_class: str = "result-con") -> bytes:
+    """
+    Builds a results listing page with a row per match id, team1 wins every odd id and the even ids are ties
+    """
+    rows = []
+    for match_id in match_ids:
+        won = (" team-won" if match_id % 2 else "")
+        rows.append('<div class="{}" data-zonedgrouping-entry-unix="1690000000000">'
+                    '<a href="/matches/{}/a-vs-b-event" class="a-reset"><div class="result"><table><tr>'
+                    '<td class="team-cell"><div class="line-align team1"><div class="team{}">Team A</div></div></td>'
+                    '<td class="result-score"><span class="score-won">{}</span> - '
+                    '<span class="score-lost">1</span></td>'
+                    '<td class="team-cell"><div class="line-align team2"><div class="team">Team B</div></div></td>'
+                    '<td class="event"><span class="event-name">Event</span></td>'
+                    '<td class="star-cell"><div class="map-and-stars"><div class="map map-text">bo3</div></div></td>'
+                    '</tr></table></div></a></div>'.format(row_class, match_id, won, (2 if match_id % 2 else 1)))
+
+    pagination = ('<span class="pagination-data">1 - 100 of {}</span>'.format(total) if total is not None else "")
+    return "<html><body>{}\n{}</body></html>".format(pagination, "\n".join(rows)).encode()
+
+
+def make_map_stats(map_id: int, rating: str = "1.05") -> dict:
+    """
+    Builds the dictionary returned by request_map_stats with two rounds and a player per team
+    """
+    return {"id": map_id,
+            "team1": {"id": 1, "first_kills": 3, "clutches": 1, "rating": rating},
+            "team2": {"id": 2, "first_kills": 2, "clutches": 0, "rating": "0.95"},
+            "rounds": [(1, 1, "ct_win"), (2, 2, "bomb_exploded")],
+            "players": [(1, 100, 20, 10, 3, 1, 15, 75.0, 85.2, 2, rating),
+                        (2, 200, 15, 5, 2, 0, 20, 60.0, 70.1, -2, "0.90")]}
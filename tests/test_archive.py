@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from archive import MatchArchive, msgpack
+from helpers import make_match
+from hltvApi import HltvApi
+
+
+class MatchArchiveTest(unittest.TestCase):
+    codec = "json"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "matches.hltv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def stored(match: dict) -> dict:
+        # Tuples are stored as lists by both codecs
+        return json.loads(json.dumps(match))
+
+    def test_roundtrip(self):
+        matches = [make_match(x) for x in (3, 1, 2)]
+        with MatchArchive(self.path, self.codec) as archive:
+            archive.extend(matches)
+            self.assertEqual(archive.get(1), self.stored(matches[1]))
+            self.assertIsNone(archive.get(4))
+            self.assertIn(2, archive)
+            self.assertEqual(archive.ids(), [1, 2, 3])
+
+        # Reopened archives keep their codec and records, iteration follows the append order
+        with MatchArchive(self.path) as archive:
+            self.assertEqual(archive.codec, self.codec)
+            self.assertEqual([x["match_info"]["match_id"] for x in archive], [3, 1, 2])
+            self.assertEqual([len(x) for x in archive.iter_batches(2)], [2, 1])
+            frames = HltvApi().normalize_matches(next(archive.iter_batches(3)))
+            self.assertEqual(frames[3].values.tolist(), HltvApi().normalize_matches(matches)[3].values.tolist())
+
+    def test_latest_record(self):
+        with MatchArchive(self.path, self.codec) as archive:
+            archive.append(make_match(1))
+            archive.append(make_match(2))
+            archive.append(make_match(1, kd="20-3"))
+
+            self.assertEqual(len(archive), 2)
+            self.assertEqual(archive.get(1), self.stored(make_match(1, kd="20-3")))
+            self.assertEqual([x["match_info"]["match_id"] for x in archive], [2, 1])
+
+    def test_not_an_archive(self):
+        with open(self.path, "wb") as file:
+            file.write(b"something else")
+        with self.assertRaises(ValueError):
+            MatchArchive(self.path)
+
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class MsgpackMatchArchiveTest(MatchArchiveTest):
+    codec = "msgpack"
+
+
+if __name__ == "__main__":
+    unittest.main()
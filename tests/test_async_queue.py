@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import MatchScheduler, FRESH
+from scraper.cache import EntityCache
+from helpers import FailingSink, make_map_stats, make_match
+
+try:
+    from asyncHltvApi import AsyncHltvApi
+except ImportError:
+    AsyncHltvApi = None
+
+
+@unittest.skipIf(AsyncHltvApi is None, "aiohttp is not installed")
+class AsyncQueueTest(unittest.TestCase):
+    def test_scheduler_order_and_late_matches(self):
+        # Urgent deadlines are served earliest first, no matter the insertion order
+        schedule = MatchScheduler()
+        schedule.add((3, "/matches/3/c"), FRESH, deadline=40)
+        schedule.add((1, "/matches/1/a"), FRESH, deadline=10)
+        schedule.add((2, "/matches/2/b"), FRESH, deadline=20)
+        requested = []
+
+        class StubApi(AsyncHltvApi):
+            async def request_match_page(self, match_id: tuple) -> bytes:
+                requested.append(match_id[0])
+                # A fresh match posted while the queue is running
+                if match_id[0] == 1:
+                    schedule.add((4, "/matches/4/d"), FRESH, deadline=30)
+                return b""
+
+            async def _parse(self, function, html, match_id):
+                return make_match(match_id[0])
+
+        frames = asyncio.run(StubApi(concurrency=1).start_matches_queue(schedule))
+
+        self.assertEqual(requested, [1, 2, 4, 3])
+        self.assertEqual(sorted(frames[3]["matchid"].tolist()), [1, 2, 3, 4])
+        self.assertEqual(len(schedule), 0)
+
+
+@unittest.skipIf(AsyncHltvApi is None, "aiohttp is not installed")
+class AsyncEntitiesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.requested = []
+        requested = self.requested
+
+        class StubApi(AsyncHltvApi):
+            async def _request(self, link: str) -> bytes:
+                requested.append(link)
+                return '<h1 class="event-hub-title">Event {}</h1>'.format(link.split("/")[-2]).encode()
+
+        self.api = StubApi(executor=ThreadPoolExecutor(1))
+
+    def tearDown(self):
+        self.api.executor.shutdown()
+        self.directory.cleanup()
+
+    def test_entities_are_awaitable(self):
+        cache = EntityCache(os.path.join(self.directory.name, "cache.db"))
+
+        async def run():
+            event = await self.api.get_event_info(5)
+            events = await self.api.get_entities("event", [5, 6, 6, "7"], cache)
+            enriched = await self.api.enrich_dataframe("event", [6, 7, 8], cache)
+            return event, events, enriched
+
+        event, events, enriched = asyncio.run(run())
+        self.assertEqual((event["id"], event["name"]), (5, "Event 5"))
+        self.assertEqual(sorted(events), [5, 6, 7])
+        self.assertEqual(enriched["name"].tolist(), ["Event 6", "Event 7", "Event 8"])
+        # Duplicated and cached ids are only requested once
+        self.assertEqual([x.split("/")[-2] for x in self.requested], ["5", "5", "6", "7", "8"])
+
+
+@unittest.skipIf(AsyncHltvApi is None, "aiohttp is not installed")
+class AsyncMapStatsTest(unittest.TestCase):
+    def test_mapstats_queue(self):
+        class StubApi(AsyncHltvApi):
+            async def _request_entity(self, kind: str, entity_id) -> dict:
+                return make_map_stats(int(entity_id))
+
+        api = StubApi()
+        sink = FailingSink(failures=1)
+
+        async def run():
+            stats = await api.request_map_stats(5)
+            frames = await api.start_mapstats_queue([10, 11, 11, 12], sink=sink, chunk_size=1, exclude=[10])
+            return stats, frames
+
+        stats, frames = asyncio.run(run())
+        self.assertEqual(stats["id"], 5)
+        self.assertEqual(api.failed_maps, [11])
+        self.assertEqual([x[0]["mapid"].tolist() for x in sink.written], [[12, 12]])
+        self.assertEqual(frames[0]["mapid"].tolist(), [12, 12])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from collections import deque
+
+from deadletter import DeadLetterQueue
+from helpers import FailingSink, StubApi
+
+
+class DeadLetterQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = DeadLetterQueue(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_retry_parse_keeps_pages_until_written(self):
+        self.queue.add_parse_failure((1, "/matches/1/a"), b"<html></html>", "utf-8", ValueError("bad page"))
+
+        with self.assertRaises(OSError):
+            self.queue.retry_parse(StubApi(), FailingSink())
+        self.assertEqual(len(self.queue.parse_failures()), 1)
+
+        frames = self.queue.retry_parse(StubApi())
+        self.assertEqual(frames[3]["matchid"].tolist(), [1])
+        self.assertEqual(self.queue.parse_failures(), [])
+
+    def test_failed_chunk_is_dead_lettered(self):
+        matches = deque([(1, "/matches/1/a"), (2, "/matches/2/b")])
+        StubApi().start_matches_queue(matches, sink=FailingSink(), dead_letters=self.queue,
+                                      progress=lambda *args: None)
+
+        self.assertEqual(sorted(self.queue.network_failures()), [(1, "/matches/1/a"), (2, "/matches/2/b")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from bs4 import BeautifulSoup
+from helpers import make_listing
+from scraper.extractor import fast_parse_match_links, Parser
+from scraper.scraper import Scraper
+
+
+class FastParseMatchLinksTest(unittest.TestCase):
+    def assertParity(self, content: bytes) -> None:
+        """
+        The regex fast path returns the same as the tree parser, or None so the tree parser is used
+        """
+        try:
+            expected = Scraper.parse_results_page(content)
+        except ValueError:
+            self.assertIsNone(fast_parse_match_links(content))
+            with self.assertRaises(ValueError):
+                Scraper.parse_results_page(content, fast=True)
+            return
+
+        parsed = fast_parse_match_links(content)
+        if parsed is not None:
+            self.assertEqual(parsed, expected)
+        self.assertEqual(Scraper.parse_results_page(content, fast=True), expected)
+
+    def test_listing(self):
+        content = make_listing([3, 2, 1], total="2500")
+        self.assertEqual(fast_parse_match_links(content), ([(3, "/matches/3/a-vs-b-event"),
+                                                            (2, "/matches/2/a-vs-b-event"),
+                                                            (1, "/matches/1/a-vs-b-event")], 2500))
+        self.assertParity(content)
+
+    def test_row_classes(self):
+        # Only divs with result-con as a whole class are listing rows
+        self.assertEqual(fast_parse_match_links(make_listing([1, 2, 3], "3", "result-con-featured")), ([], 3))
+        self.assertEqual(len(fast_parse_match_links(make_listing([1, 2, 3], "3", "x result-con"))[0]), 3)
+        for row_class in ("result-con-featured", "x result-con", "result-con x", "result-con"):
+            self.assertParity(make_listing([1, 2, 3], "3", row_class))
+
+    def test_pagination(self):
+        self.assertIsNone(fast_parse_match_links(make_listing([1], "61,234")))
+        self.assertIsNone(fast_parse_match_links(make_listing([1])))
+        self.assertEqual(fast_parse_match_links(make_listing([])), ([], None))
+        for total in ("61,234", "61234", None):
+            self.assertParity(make_listing([1, 2], total))
+            self.assertParity(make_listing([], total))
+
+
+class MatchSummaryTest(unittest.TestCase):
+    def test_summary_rows(self):
+        soup = BeautifulSoup(make_listing([7, 8]).decode(), "html.parser")
+        won, tie = [Parser.parse_match_summary(div) for div in soup.find_all("div", class_="result-con")]
+
+        self.assertEqual(won, {"match_id": 7, "link": "/matches/7/a-vs-b-event", "date": "2023-07-22 04:26:40+00:00",
+                               "team1": "Team A", "team2": "Team B", "t1_score": 2, "t2_score": 1, "winner": "Team A",
+                               "event_name": "Event", "format": "bo3"})
+        self.assertEqual((tie["t1_score"], tie["t2_score"], tie["winner"]), (1, 1, None))
+
+    def test_summary_page(self):
+        matches, total = Scraper.parse_results_page(make_listing([7, 8], "2"), summary=True)
+        self.assertEqual([x["match_id"] for x in matches], [7, 8])
+        self.assertEqual(total, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+
+from helpers import MemorySink, StubApi
+
+
+class MatchesQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_sink_processes_whole_queue(self):
+        sink = MemorySink()
+        matches = [(x, "/matches/{}/a".format(x)) for x in range(1, 602)]
+        StubApi().start_matches_queue(matches, sink=sink, chunk_size=200, progress=lambda *args: None)
+
+        self.assertEqual(sum(len(frames[3]) for frames in sink.written), 601)
+        self.assertEqual(os.listdir("."), [])
+
+    def test_memory_queue_stops_at_default_limit(self):
+        matches = [(x, "/matches/{}/a".format(x)) for x in range(1, 602)]
+        frames = StubApi().start_matches_queue(matches, progress=lambda *args: None)
+
+        self.assertEqual(len(frames[3]), 500)
+        self.assertEqual(sorted(os.listdir(".")), ["failed_matches", "pending_matches"])
+
+
+if __name__ == "__main__":
+    unittest.main()
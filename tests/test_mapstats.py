@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from helpers import FailingSink, StubApi, make_map_stats
+from sinks import CsvSink, SqliteSink
+
+
+class MapStatsApi(StubApi):
+    def __init__(self):
+        super().__init__()
+        self.requested = []
+
+    def get_entities(self, kind: str, ids: list, cache=None, max_workers: int = 4) -> dict:
+        self.requested.extend(ids)
+        return {x: make_map_stats(x) for x in ids}
+
+
+class MapStatsQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_written_maps_are_skipped(self):
+        for sink in (lambda: CsvSink(self.directory.name),
+                     lambda: SqliteSink(os.path.join(self.directory.name, "hltv.db"))):
+            api = MapStatsApi()
+            api.start_mapstats_queue([10, 10, 11], sink=sink(), chunk_size=1)
+            # Second run over the same sink only processes the new map
+            frames = api.start_mapstats_queue([10, 11, 12], sink=sink(), exclude=[])
+
+            self.assertEqual(api.requested, [10, 11, 12])
+            self.assertEqual(frames[0]["mapid"].tolist(), [12, 12])
+            self.assertEqual(sink().keys("MapTeamsFact", "mapid"), {10, 11, 12})
+
+    def test_failed_chunk(self):
+        api = MapStatsApi()
+        sink = FailingSink(failures=1)
+        api.start_mapstats_queue([10, 11, 12], sink=sink, chunk_size=2)
+
+        self.assertEqual(api.failed_maps, [10, 11])
+        self.assertEqual([frames[0]["mapid"].tolist() for frames in sink.written], [[12, 12]])
+
+    def test_malformed_values(self):
+        api = MapStatsApi()
+        api.get_entities = lambda kind, ids, cache=None, max_workers=4: {x: make_map_stats(x, "-") for x in ids}
+        teams, rounds, players = api.start_mapstats_queue([10])
+
+        self.assertEqual(teams["rating"].isna().tolist(), [True, False])
+        self.assertEqual(players["rating"].isna().tolist(), [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import pandas as pd
+
+from hltvApi import HltvApi, MatchRows
+from helpers import make_match
+
+
+class MatchRowsTest(unittest.TestCase):
+    def setUp(self):
+        self.api = HltvApi()
+
+    def test_malformed_row_does_not_fail_batch(self):
+        matches = [make_match(x) for x in range(1, 5)] + [make_match(5, kd="-", score="abc")]
+        rows = MatchRows(self.api)
+        for match in matches:
+            rows.add(match)
+
+        teams, events, players, match_df, map_df, player_df = rows.frames()
+        self.assertEqual(len(match_df), 5)
+        self.assertEqual(len(map_df), 10)
+        self.assertEqual(len(player_df), 10)
+
+        # Only the malformed values are missing, the rest of the batch keeps its values
+        bad = player_df["matchId"] == 5
+        self.assertTrue(player_df.loc[bad, "ct_kills"].isna().all())
+        self.assertEqual(player_df.loc[~bad, "ct_kills"].tolist(), [16] * 8)
+        self.assertEqual(map_df["score"].isna().sum(), 1)
+
+    def test_process_methods_match_batch_path(self):
+        match = make_match(1)
+        frames = self.api.normalize_matches([match])
+        players = {}
+
+        self.assertEqual(self.api.process_match(match), frames[3].iloc[0].tolist())
+        self.assertEqual(self.api.process_results(match), frames[4].values.tolist())
+        self.assertEqual(self.api.process_players(match, players), frames[5].values.tolist())
+        self.assertEqual(players[100], ["A", "a", "Spain"])
+        self.assertIsInstance(frames[3]["date"].iloc[0], pd.Timestamp)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import pickle
+import unittest
+
+from helpers import StubApi
+from scheduler import MatchScheduler, FRESH, WATCHED, BACKFILL
+
+
+def match(match_id: int) -> tuple:
+    return match_id, "/matches/{}/a".format(match_id)
+
+
+def drain(schedule: MatchScheduler) -> list:
+    return [schedule.pop()[0] for _ in range(len(schedule))]
+
+
+class MatchSchedulerTest(unittest.TestCase):
+    def test_class_shares(self):
+        schedule = MatchScheduler(weights={FRESH: 3, BACKFILL: 1})
+        schedule.extend(map(match, range(100, 108)), BACKFILL)
+        schedule.extend(map(match, range(1, 9)), FRESH)
+
+        # Backfill keeps progressing at a quarter of the budget while fresh matches are queued
+        order = drain(schedule)
+        self.assertEqual(sum(x >= 100 for x in order[:8]), 2)
+        self.assertEqual([x for x in order if x < 100], list(range(1, 9)))
+        self.assertEqual([x for x in order if x >= 100], list(range(100, 108)))
+
+    def test_deadlines(self):
+        schedule = MatchScheduler(urgency=60)
+        schedule.extend(map(match, range(1, 4)), FRESH)
+        schedule.add(match(10), BACKFILL, deadline=30)
+        schedule.add(match(11), WATCHED, deadline=10)
+
+        self.assertEqual(drain(schedule), [11, 10, 1, 2, 3])
+        with self.assertRaises(IndexError):
+            schedule.pop()
+
+    def test_requeued_match(self):
+        schedule = MatchScheduler()
+        schedule.add(match(1), BACKFILL)
+        schedule.add(match(2), BACKFILL)
+        schedule.add(match(2), FRESH)
+        schedule.add(match(2), BACKFILL)
+
+        self.assertEqual(len(schedule), 2)
+        self.assertEqual(drain(schedule), [2, 1])
+
+    def test_pickle(self):
+        schedule = MatchScheduler()
+        schedule.extend(map(match, range(1, 4)), WATCHED)
+        schedule.add(match(9), FRESH)
+        schedule.pop()
+
+        restored = pickle.loads(pickle.dumps(schedule))
+        restored.add(match(10), WATCHED)
+        self.assertEqual(drain(restored), [1, 2, 3, 10])
+
+    def test_matches_queue(self):
+        schedule = MatchScheduler()
+        schedule.extend(map(match, (1, 2)), FRESH)
+        schedule.add(match(3), BACKFILL)
+        requested = []
+
+        class Api(StubApi):
+            def request_match_page(self, match_id: tuple, session=None):
+                requested.append(match_id[0])
+                # A fresh match posted while the queue is running
+                if match_id[0] == 1:
+                    schedule.add(match(4), FRESH)
+                return super().request_match_page(match_id, session)
+
+        # Backfill gets its share after the first fresh match, the late fresh match is still served
+        frames = Api().start_matches_queue(schedule, progress=lambda *args: None)
+        self.assertEqual(requested, [1, 3, 2, 4])
+        self.assertEqual(frames[3]["matchid"].tolist(), [1, 3, 2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from helpers import StubApi
+from service import MatchService, ServiceHandler
+
+
+class TeamsApi(StubApi):
+    def __init__(self):
+        super().__init__()
+        self.limits = []
+
+    def get_matches_teamid(self, teamid, limit: int = 100, summary: bool = False, fast: bool = False) -> list:
+        self.limits.append(limit)
+        return [{"match_id": x} for x in range(limit)]
+
+
+class ServiceHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.api = TeamsApi()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ServiceHandler)
+        self.server.service = MatchService(self.api)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path: str) -> tuple:
+        try:
+            with urllib.request.urlopen("http://127.0.0.1:{}{}".format(self.server.server_port, path)) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_team_matches_limit(self):
+        for limit in ("0", "1001", "-1", "x"):
+            self.assertEqual(self.get("/teams/5/matches?limit=" + limit)[0], 400)
+        self.assertEqual(self.api.limits, [])
+
+        status, body = self.get("/teams/5/matches?limit=3")
+        self.assertEqual((status, len(body)), (200, 3))
+        self.assertEqual(self.api.limits, [3])
+
+    def test_match_frames(self):
+        status, body = self.get("/matches/7/frames")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["MatchDim"]["data"][0][0], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
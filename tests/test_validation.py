@@ -0,0 +1,99 @@
+import unittest
+from collections import deque
+
+import pandas as pd
+
+from hltvApi import HltvApi, MatchRows
+from sinks import TABLE_NAMES
+from validation import FrameValidator, SCHEMA
+from helpers import FailingSink, make_match
+
+
+def match_frames(match_ids: list) -> list[pd.DataFrame]:
+    """
+    Builds frames with only MatchDim rows, every foreign key of the MatchDim rows is known to the validator
+    """
+    match_df = pd.DataFrame({"matchid": match_ids, "bestof": 1, "instance": "Final", "eventid": 10, "lan": 1,
+                             "date": "2021-05-01", "team1id": 1, "team2id": 2, "winnerid": 1})
+    frames = [pd.DataFrame(columns=[*filter(None, SCHEMA[name])]) for name in TABLE_NAMES]
+    frames[3] = match_df
+    return frames
+
+
+class FrameValidatorTest(unittest.TestCase):
+    def test_primary_keys_across_chunks(self):
+        validator = FrameValidator(known={"TeamDim": [1, 2], "EventDim": [10]})
+        validator.validate(match_frames([1, 2]))
+        valid = validator.validate(match_frames([3, 1]))
+
+        self.assertEqual(valid[3]["matchid"].tolist(), [3])
+        quarantined = validator.quarantined_frames()[3]
+        self.assertEqual(quarantined["matchid"].tolist(), [1])
+        self.assertEqual(quarantined["reason"].tolist(), ["primary key already loaded"])
+
+    def test_raw_values_are_quarantined(self):
+        validator = FrameValidator()
+        rows = MatchRows(HltvApi(), validator)
+        for match in [make_match(1), make_match(2, kd="-", score="abc")]:
+            rows.add(match)
+
+        teams, events, players, match_df, map_df, player_df = rows.frames()
+        quarantined = validator.quarantined_frames()
+
+        self.assertEqual(match_df["matchid"].tolist(), [1, 2])
+        self.assertEqual(map_df["matchid"].tolist(), [1, 1])
+        self.assertEqual(quarantined[4]["reason"].tolist(),
+                         ["score is not an integer", "enemy_score is not an integer"])
+        self.assertEqual(quarantined[5]["reason"].tolist(), ["ct_kills is null"] * 2)
+        self.assertEqual(player_df["matchId"].tolist(), [1, 1])
+        self.assertEqual(str(player_df["ct_kills"].dtype), "Int16")
+
+    def test_fact_keys_across_chunks(self):
+        validator = FrameValidator()
+        rows = MatchRows(HltvApi(), validator)
+        rows.add(make_match(1))
+        rows.frames()
+        rows.clear()
+
+        # Same match in a later chunk, its match, map and player stats rows are already loaded
+        rows.add(make_match(1))
+        frames = rows.frames()
+        self.assertEqual([len(df) for df in frames[3:]], [0, 0, 0])
+
+    def test_known_fact_keys(self):
+        # Keys passed as tuples are packed like the keys of the validated rows
+        validator = FrameValidator(known={"MapsFact": [(10, 1)], "PlayersFact": [(10, 1, 100)]})
+        rows = MatchRows(HltvApi(), validator)
+        rows.add(make_match(1))
+        teams, events, players, match_df, map_df, player_df = rows.frames()
+
+        self.assertEqual(map_df["teamid"].tolist(), [2])
+        self.assertEqual(player_df["playerid"].tolist(), [200])
+        self.assertEqual(validator.quarantined_frames()[4]["reason"].tolist(), ["primary key already loaded"])
+
+    def test_failed_write_can_be_retried(self):
+        validator = FrameValidator()
+        rows = MatchRows(HltvApi(), validator)
+        sink = FailingSink(failures=1)
+        failed = deque()
+
+        rows.add(make_match(1), (1, "/matches/1/a"))
+        HltvApi._flush_chunk(rows, sink, failed)
+        self.assertEqual(list(failed), [(1, "/matches/1/a")])
+
+        # Keys of the failed chunk weren't loaded, the retried match is written instead of quarantined
+        rows.add(make_match(1), failed.pop())
+        HltvApi._flush_chunk(rows, sink, failed)
+        teams, events, players, match_df, map_df, player_df = sink.written[0]
+        self.assertEqual(teams.index.tolist(), [1, 2])
+        self.assertEqual(match_df["matchid"].tolist(), [1])
+        self.assertEqual(len(player_df), 2)
+        self.assertTrue(all(df.empty for df in validator.quarantined_frames()))
+
+        # Once written, the same match is rejected
+        rows.add(make_match(1))
+        self.assertEqual([len(df) for df in rows.frames()[3:]], [0, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import time
+import unittest
+
+from helpers import StubApi
+from watcher import MatchWatcher
+
+
+class Response:
+    def __init__(self, status_code: int = 200, text: str = "", etag: str = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = ({"ETag": etag} if etag else {})
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise OSError("{} error".format(self.status_code))
+
+
+class Session:
+    """
+    Answers every match page with the next queued response and records the request headers
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.headers = []
+
+    def get(self, link: str, headers: dict = None) -> Response:
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+class WatcherApi(StubApi):
+    def __init__(self):
+        super().__init__()
+        self.results = [(1, "/matches/1/a")]
+
+    def get_last_matches(self, limit: int = 100, fast: bool = False) -> list:
+        if isinstance(self.results, Exception):
+            raise self.results
+        return self.results
+
+
+class MatchWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.api = WatcherApi()
+        self.watcher = MatchWatcher(self.api, min_interval=60, max_interval=240)
+        self.watcher.session = Session()
+
+    def poll(self, *responses: Response):
+        # Every watched match is due on each poll
+        for state in self.watcher.watched.values():
+            state["next_poll"] = 0
+        self.watcher.session.responses.extend(responses)
+        return self.watcher.poll()
+
+    def test_changed_fragments(self):
+        frames = self.poll(Response(text='<div class="mapholder">16-10</div>', etag='"a"'))
+        self.assertEqual(frames[3]["matchid"].tolist(), [1])
+
+        # Same fragments with a different page around them, then 304 Not Modified
+        self.assertIsNone(self.poll(Response(text='<p>ad</p><div class="mapholder">16-10</div>', etag='"b"')))
+        self.assertIsNone(self.poll(Response(304)))
+        self.assertEqual(self.watcher.session.headers[-1], {"If-None-Match": '"b"'})
+        self.assertEqual(self.watcher.watched[1]["interval"], 240)
+
+        frames = self.poll(Response(text='<div class="mapholder">16-12</div>'))
+        self.assertEqual(frames[3]["matchid"].tolist(), [1])
+        self.assertEqual(self.watcher.watched[1]["interval"], 60)
+
+    def test_failed_results_page(self):
+        self.api.results = OSError("503 error")
+        self.assertIsNone(self.poll())
+        self.assertEqual(self.watcher.watched, {})
+
+        # The results page is retried after min_interval instead of results_interval
+        self.assertLessEqual(self.watcher.next_results_poll, time.time() + 60)
+        self.api.results = [(1, "/matches/1/a")]
+        self.watcher.next_results_poll = 0
+        frames = self.poll(Response(text='<div class="mapholder">16-10</div>'))
+        self.assertEqual(frames[3]["matchid"].tolist(), [1])
+
+    def test_failed_match_page(self):
+        self.poll(Response(503))
+        self.assertEqual(self.watcher.watched[1]["fingerprint"], None)
+        self.assertEqual(self.watcher.watched[1]["interval"], 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+"""
+Checks the six frames built by start_matches_queue against the schema in queries.py before they are loaded, so a
+single row from an edge case doesn't make a whole batched insert fail and roll back. Offending rows are moved to a
+quarantine with the reason they were rejected.
+"""
+from sinks import Sink, TABLE_NAMES
+
+import numpy as np
+import pandas as pd
+
+# Column types of queries.py as (type, length, nullable) by DataFrame column, None is the index of dimension frames
+SCHEMA = {"TeamDim": {None: ("INT", None, False),
+                      "teamName": ("VARCHAR", 100, False)},
+          "EventDim": {None: ("INT", None, False),
+                       "eventName": ("VARCHAR", 100, False)},
+          "PlayerDim": {None: ("INT", None, False),
+                        "playerName": ("VARCHAR", 100, False),
+                        "playerNick": ("VARCHAR", 45, False),
+                        "nationality": ("VARCHAR", 45, True)},
+          "MatchDim": {"matchid": ("INT", None, False),
+                       "bestof": ("SMALLINT", None, False),
+                       "instance": ("VARCHAR", 300, True),
+                       "eventid": ("INT", None, False),
+                       "lan": ("SMALLINT", None, False),
+                       "date": ("DATE", None, False),
+                       "team1id": ("INT", None, False),
+                       "team2id": ("INT", None, False),
+                       "winnerid": ("INT", None, False)},
+          "MapsFact": {"mapid": ("INT", None, False),
+                       "matchid": ("INT", None, False),
+                       "teamid": ("INT", None, False),
+                       "map": ("VARCHAR", 45, False),
+                       "score": ("TINYINT", None, False),
+                       "enemy_score": ("TINYINT", None, False),
+                       "ct_result": ("TINYINT", None, False),
+                       "t_result": ("TINYINT", None, False),
+                       "overtime": ("TINYINT", None, True),
+                       "won": ("TINYINT", None, True),
+                       "pick": ("TINYINT", None, True)},
+          "PlayersFact": {"mapId": ("INT", None, False),
+                          "teamid": ("INT", None, False),
+                          "matchId": ("INT", None, False),
+                          "playerid": ("INT", None, False),
+                          "map": ("VARCHAR", 100, True),
+                          "ct_kills": ("TINYINT", None, False),
+                          "ct_deaths": ("TINYINT", None, False),
+                          "ct_adr": ("FLOAT", None, False),
+                          "t_kills": ("TINYINT", None, False),
+                          "t_deaths": ("TINYINT", None, False),
+                          "t_adr": ("FLOAT", None, False)}}
+
+# Signed ranges of the MySQL integer types
+RANGES = {"TINYINT": (-2 ** 7, 2 ** 7 - 1), "SMALLINT": (-2 ** 15, 2 ** 15 - 1), "INT": (-2 ** 31, 2 ** 31 - 1)}
+
+PRIMARY_KEYS = {"TeamDim": [None], "EventDim": [None], "PlayerDim": [None], "MatchDim": ["matchid"],
+                "MapsFact": ["mapid", "teamid"], "PlayersFact": ["mapId", "matchId", "playerid"]}
+
+# Columns packed in one int64 to remember the loaded keys. A map id belongs to a single match, so (mapId, playerid)
+# identifies a PlayersFact row and both ids fit in 32 bits each
+PACKED_KEYS = {**PRIMARY_KEYS, "PlayersFact": ["mapId", "playerid"]}
+
+# Referenced tables are validated first, so their accepted keys are known when the referencing frame is checked
+FOREIGN_KEYS = {"MatchDim": [("team1id", "TeamDim"), ("team2id", "TeamDim"), ("eventid", "EventDim"),
+                             ("winnerid", "TeamDim")],
+                "MapsFact": [("teamid", "TeamDim"), ("matchid", "MatchDim")],
+                "PlayersFact": [("matchId", "MatchDim"), ("playerid", "PlayerDim"), ("teamid", "TeamDim")]}
+
+
+class FrameValidator:
+    """
+    Vectorized pre-load validation of the frames built by MatchRows, run over the raw scraped values before they are
+    converted to the column types. Every check runs once per column over the whole chunk: null, type, range and length
+    checks from SCHEMA, primary keys and foreign keys. Primary keys are checked against the chunk and the keys accepted
+    in previous chunks, and foreign keys are looked up among accepted keys too, since MatchRows only emits each
+    dimension row once. Accepted keys of every table are kept in memory for the life of the validator as a sorted int64
+    array (composite keys packed as PACKED_KEYS), keys of a chunk that is written to a sink are only remembered by
+    commit once the write succeeded, so the chunk can be retried.
+    Rejected rows get a reason column and are written to the quarantine sink, or kept in memory without one.
+
+        validator = FrameValidator(quarantine=CsvSink("quarantine"))
+        bot.start_matches_queue(matches, sink=SqliteSink("hltv.db"), validator=validator)
+    """
+
+    def __init__(self, quarantine: Sink = None, known: dict = None):
+        """
+        :param quarantine: destination for the rejected rows, named as TABLE_NAMES with an extra reason column
+        :type quarantine: Sink
+        :param known: keys already loaded by table name, for example read from the database when a queue is resumed.
+                      Keys of MapsFact and PlayersFact are tuples ordered as PRIMARY_KEYS
+        :type known: dict
+        """
+        self.quarantine = quarantine
+        self.known = {name: np.empty(0, dtype="int64") for name in TABLE_NAMES}
+        for name, keys in (known or {}).items():
+            columns = PRIMARY_KEYS[name]
+            df = (pd.DataFrame(index=list(keys)) if columns == [None] else
+                  pd.DataFrame([(key if len(columns) > 1 else [key]) for key in keys], columns=columns))
+            codes, valid = self._codes(name, df)
+            self.known[name] = np.unique(codes[valid])
+        # Keys accepted in the last validated chunk that were not committed yet
+        self.pending = {name: np.empty(0, dtype="int64") for name in TABLE_NAMES}
+        self.quarantined = {name: [] for name in TABLE_NAMES}
+
+    @staticmethod
+    def _column(df: pd.DataFrame, column: str) -> pd.Series:
+        return (df.index.to_series() if column is None else df[column])
+
+    def _keys(self, name: str, df: pd.DataFrame) -> pd.Index:
+        """
+        Returns the primary key of every row as numbers. EventDim is indexed by the id text of the event link, so
+        keys are compared as numbers to match the integer keys and foreign key columns of the other frames
+        """
+        arrays = [pd.to_numeric(self._column(df, column), errors="coerce").to_numpy() for column in PRIMARY_KEYS[name]]
+        return (pd.MultiIndex.from_arrays(arrays) if len(arrays) > 1 else pd.Index(arrays[0]))
+
+    @staticmethod
+    def _pack(columns: list[pd.Series]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Packs one or two INT columns in one int64 per row
+        :return: tuple with the packed values and whether every value of the row is an integer in the INT range
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        low, high = RANGES["INT"]
+        arrays = [pd.to_numeric(column, errors="coerce").to_numpy(dtype=float, na_value=np.nan) for column in columns]
+        valid = np.logical_and.reduce([(array >= low) & (array <= high) for array in arrays])
+        ints = [np.where(valid, array, 0).astype("int64") for array in arrays]
+
+        return ((ints[0] << 32) | (ints[1] & 0xFFFFFFFF) if len(ints) > 1 else ints[0]), valid
+
+    def _codes(self, name: str, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        return self._pack([self._column(df, column) for column in PACKED_KEYS[name]])
+
+    def _loaded(self, name: str, codes: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """
+        Returns whether every packed key was committed or accepted in the chunk being validated, the committed keys
+        are sorted so they are looked up with a binary search instead of being hashed again for every chunk
+        """
+        known = self.known[name]
+        found = np.isin(codes, self.pending[name])
+        if len(known):
+            position = np.minimum(np.searchsorted(known, codes), len(known) - 1)
+            found |= known[position] == codes
+
+        return valid & found
+
+    def _check(self, name: str, df: pd.DataFrame) -> pd.Series:
+        """
+        Returns the rejection reason of every row, NaN for valid rows. The first failed check is the one reported
+        """
+        reason = pd.Series(np.nan, index=pd.RangeIndex(len(df)), dtype=object)
+
+        def reject(mask, text: str) -> None:
+            mask = np.asarray(mask, dtype=bool) & reason.isna().to_numpy()
+            reason[mask] = text
+
+        for column, (kind, length, nullable) in SCHEMA[name].items():
+            values = self._column(df, column)
+            label = (column or "index")
+            missing = values.isna().to_numpy()
+            if not nullable:
+                reject(missing, "{} is null".format(label))
+
+            if kind in RANGES:
+                numbers = pd.to_numeric(values, errors="coerce")
+                low, high = RANGES[kind]
+                reject(~missing & numbers.isna().to_numpy(), "{} is not an integer".format(label))
+                reject(~missing & ((numbers < low) | (numbers > high)).to_numpy(),
+                       "{} out of {} range".format(label, kind))
+            elif kind == "FLOAT":
+                numbers = pd.to_numeric(values, errors="coerce")
+                reject(~missing & ~np.isfinite(numbers.astype(float)).to_numpy(), "{} is not a number".format(label))
+            elif kind == "VARCHAR":
+                reject(~missing & (values.astype(str).str.len() > length).to_numpy(),
+                       "{} longer than {}".format(label, length))
+            elif kind == "DATE":
+                reject(~missing & pd.to_datetime(values, errors="coerce").isna().to_numpy(),
+                       "{} is not a date".format(label))
+
+        keys = self._keys(name, df)
+        reject(keys.duplicated(), "duplicated primary key")
+        reject(self._loaded(name, *self._codes(name, df)), "primary key already loaded")
+
+        for column, table in FOREIGN_KEYS.get(name, []):
+            reject(~self._loaded(table, *self._pack([df[column]])), "{} not found in {}".format(column, table))
+
+        return reason
+
+    def validate(self, frames: list[pd.DataFrame], commit: bool = True) -> list[pd.DataFrame]:
+        """
+        Splits each frame in valid and rejected rows, rejected rows are quarantined
+        :param frames: list of DataFrames ordered as TABLE_NAMES
+        :type frames: list[pd.DataFrame]
+        :param commit: if False, the accepted keys are kept pending until commit is called, for example after the
+                       chunk was written. Keys left pending are dropped when the next chunk is validated
+        :type commit: bool
+        :return: list of DataFrames with the valid rows only, ready to be loaded
+        :rtype: list[pd.DataFrame]
+        """
+        valid = []
+        rejected = []
+        self.pending = {name: np.empty(0, dtype="int64") for name in TABLE_NAMES}
+        for name, df in zip(TABLE_NAMES, frames):
+            reason = self._check(name, df)
+            bad = reason.notna().to_numpy()
+            valid.append(df[~bad])
+            rejected.append(df[bad].assign(reason=reason[bad].to_numpy()))
+
+            # Accepted keys can be referenced by the next frames, and by the next chunks once committed
+            codes, _ = self._codes(name, df[~bad])
+            self.pending[name] = codes
+
+        count = sum(len(df) for df in rejected)
+        if count:
+            print("QUARANTINED ROWS: ", count)
+            if self.quarantine is not None:
+                self.quarantine.write(rejected)
+            else:
+                for name, df in zip(TABLE_NAMES, rejected):
+                    self.quarantined[name].append(df)
+
+        if commit:
+            self.commit()
+
+        return valid
+
+    def commit(self) -> None:
+        """
+        Remembers the keys accepted in the last validated chunk as loaded, so they can't be loaded again
+        """
+        for name, codes in self.pending.items():
+            # Accepted keys are never loaded already, inserting them keeps the array sorted without sorting it again
+            codes = np.unique(codes)
+            if len(codes):
+                self.known[name] = np.insert(self.known[name], np.searchsorted(self.known[name], codes), codes)
+        self.pending = {name: np.empty(0, dtype="int64") for name in TABLE_NAMES}
+
+    def quarantined_frames(self) -> list[pd.DataFrame]:
+        """
+        Returns the rows rejected so far when there is no quarantine sink
+        :return: list of DataFrames ordered as TABLE_NAMES, with an extra reason column
+        :rtype: list[pd.DataFrame]
+        """
+        return [(pd.concat(frames) if frames else pd.DataFrame(columns=[*filter(None, SCHEMA[name]), "reason"]))
+                for name, frames in self.quarantined.items()]
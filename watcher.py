@@ -0,0 +1,177 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from hltvApi import HltvApi, MatchRows
+from typing import Callable, Union
+
+import hashlib
+import requests
+import time
+import pandas as pd
+
+
+class MatchWatcher:
+    """
+    Keeps recent matches up to date. Match pages keep changing for a while after a result is posted (stats tables are
+    filled, scores corrected), so the watcher polls the last results and the watched match pages on an adaptive
+    schedule and only re-parses the pages whose mapholder or stats-content fragments changed. Polling is conditional,
+    pages answered with 304 Not Modified are not even fingerprinted.
+    """
+
+    # Only the fragments that end up in the normalized rows are fingerprinted, the rest of the page changes constantly
+    fragments = SoupStrainer("div", class_=["mapholder", "stats-content"])
+
+    def __init__(self, api: HltvApi = None, min_interval: float = 60, max_interval: float = 1800,
+                 watch_hours: float = 24, results_interval: float = 300):
+        """
+        :param api: HltvApi instance used to request and normalize matches
+        :type api: HltvApi
+        :param min_interval: seconds between polls of a match page that just changed
+        :type min_interval: float
+        :param max_interval: max seconds between polls of a match page, interval doubles every unchanged poll
+        :type max_interval: float
+        :param watch_hours: hours a match is watched since it was first seen
+        :type watch_hours: float
+        :param results_interval: seconds between polls of the last results page to find new matches
+        :type results_interval: float
+        """
+        self.api = (api if api is not None else HltvApi())
+        self.session = requests.Session()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.watch_seconds = watch_hours * 3600
+        self.results_interval = results_interval
+
+        # Watched matches state by match id: link, first seen time, next poll time, interval, validators, fingerprint
+        self.watched = {}
+        self.next_results_poll = 0
+
+    def watch(self, match_id: tuple, seconds: float = None) -> None:
+        """
+        Adds a match to the watched matches, if it is already watched its next poll is moved to now
+        :param match_id: tuple with (match id number, match link)
+        :type match_id: tuple
+        :param seconds: seconds the match is watched, defaults to watch_hours
+        :type seconds: float
+        """
+        now = time.time()
+        if match_id[0] in self.watched:
+            self.watched[match_id[0]]["next_poll"] = now
+            return
+
+        self.watched[match_id[0]] = {"link": match_id[1],
+                                     "until": now + (seconds if seconds is not None else self.watch_seconds),
+                                     "next_poll": now,
+                                     "interval": self.min_interval,
+                                     "etag": None,
+                                     "last_modified": None,
+                                     "fingerprint": None}
+
+    def fingerprint(self, html: str) -> str:
+        """
+        Hashes the mapholder and stats-content fragments of a match page
+        :param html: match page html
+        :type html: str
+        :return: hex digest of the fragments
+        :rtype: str
+        """
+        soup = BeautifulSoup(html, "html.parser", parse_only=self.fragments)
+        return hashlib.blake2b(str(soup).encode(), digest_size=16).hexdigest()
+
+    def _request(self, state: dict) -> Union[requests.Response, None]:
+        """
+        Makes a conditional request for a watched match page, returns None if the server answered 304 Not Modified
+        """
+        headers = {}
+        if state["etag"]:
+            headers["If-None-Match"] = state["etag"]
+        if state["last_modified"]:
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        self.api.limiter.acquire()
+        html = self.session.get(self.api.base + state["link"], headers=headers)
+        if html.status_code == 304:
+            return None
+        html.raise_for_status()
+
+        state["etag"] = html.headers.get("ETag")
+        state["last_modified"] = html.headers.get("Last-Modified")
+        return html
+
+    def poll_results(self) -> None:
+        """
+        Requests the last results page and starts watching the matches that are not watched yet
+        """
+        for match_id in self.api.get_last_matches(limit=100, fast=True):
+            if match_id[0] not in self.watched:
+                self.watch(match_id)
+        self.next_results_poll = time.time() + self.results_interval
+
+    def poll(self) -> Union[list[pd.DataFrame], None]:
+        """
+        Polls the last results if they are due and every watched match whose next poll time passed. Matches with
+        changed fragments are parsed and normalized, the interval of a match is reset when it changes and doubled when
+        it doesn't, and matches older than their watch window are dropped
+        :return: list of normalized DataFrames (same as start_matches_queue) for the changed matches, None if nothing
+                 changed
+        :rtype: list of DataFrames, None
+        """
+        if time.time() >= self.next_results_poll:
+            try:
+                self.poll_results()
+            except Exception as e:
+                # A failed results page (503, timeout) is retried soon instead of stopping the watcher
+                print("An exception was raised polling the last results: ", e)
+                self.next_results_poll = time.time() + min(self.min_interval, self.results_interval)
+
+        now = time.time()
+        rows = MatchRows(self.api)
+        for match_id, state in list(self.watched.items()):
+            if now >= state["until"]:
+                del self.watched[match_id]
+                continue
+            if now < state["next_poll"]:
+                continue
+
+            try:
+                html = self._request(state)
+                changed = False
+                if html is not None:
+                    fingerprint = self.fingerprint(html.text)
+                    if fingerprint != state["fingerprint"]:
+                        rows.add(self.api.parse_match_page(html.text, (match_id, state["link"])))
+                        # Fingerprint is only stored once the match was normalized, so failed parses are retried
+                        state["fingerprint"] = fingerprint
+                        changed = True
+
+            except Exception as e:
+                print("An exception was raised on: ", (match_id, state["link"]))
+                print(e)
+                changed = False
+
+            # Adaptive schedule, pages that keep changing are polled often, quiet ones less and less
+            state["interval"] = (self.min_interval if changed else min(state["interval"] * 2, self.max_interval))
+            state["next_poll"] = now + state["interval"]
+
+        if rows.matches == 0:
+            return None
+        return rows.frames()
+
+    def run(self, callback: Callable[[list[pd.DataFrame]], None], rounds: int = None) -> None:
+        """
+        Polls forever (or the number of rounds requested) sleeping until the next poll is due, and calls callback with
+        the normalized DataFrames of the matches that changed
+        :param callback: function receiving the list of DataFrames returned by poll
+        :type callback: Callable
+        :param rounds: number of polls before returning, None to poll forever
+        :type rounds: int
+        """
+        done = 0
+        while rounds is None or done < rounds:
+            frames = self.poll()
+            if frames is not None:
+                callback(frames)
+            done += 1
+            if rounds is not None and done >= rounds:
+                break
+
+            next_polls = [state["next_poll"] for state in self.watched.values()] + [self.next_results_poll]
+            time.sleep(max(0, min(next_polls) - time.time()))